@@ -1,10 +1,28 @@
 import streamlit as st
 from recommendations_engine import EducationalRecommender
+from document_upload import get_document_processor
+from knowledge_sync import KnowledgeSync
 import plotly.graph_objects as go
 import pandas as pd
 
-# Inicializar el motor de recomendaciones
-recommender = EducationalRecommender()
+@st.cache_resource
+def get_recommender():
+    """Motor de recomendaciones compartido por todas las sesiones del proceso."""
+    return EducationalRecommender()
+
+@st.cache_resource
+def get_knowledge_sync():
+    """Sincronización de la base de conocimiento extraída con el motor compartido."""
+    return KnowledgeSync(get_document_processor(), get_recommender())
+
+@st.cache_data(max_entries=1024, show_spinner=False)
+def analyze_evaluation(form_data, knowledge_version=0):
+    """Análisis cacheado por contenido del formulario: envíos idénticos no se recalculan.
+
+    La versión de la base de conocimiento forma parte de la clave, así que al
+    sincronizar recomendaciones nuevas no se reutilizan análisis anteriores.
+    """
+    return get_recommender().get_personalized_recommendations(form_data)
 
 def create_radar_chart(scores):
     """Crear gráfico de radar con los resultados de las evaluaciones."""
@@ -81,7 +99,7 @@ def main():
         st.subheader("📋 Datos de Evaluación")
         
         form_data = {}
-        categories = recommender.categories
+        categories = get_recommender().categories
         for category, fields in categories.items():
             st.write(f"### {category.title()}")
             for field in fields:
@@ -93,7 +111,9 @@ def main():
         submit_button = st.form_submit_button(label="Generar Recomendaciones")
     
     if submit_button:
-        analysis = recommender.get_personalized_recommendations(form_data)
+        # Incorporar las recomendaciones extraídas desde la última sincronización
+        get_knowledge_sync().sync()
+        analysis = analyze_evaluation(form_data, get_recommender().version)
         display_recommendations(analysis)
 
 if __name__ == "__main__":
@@ -0,0 +1,236 @@
+# benchmark.py
+import sys
+import json
+import time
+import random
+import argparse
+import platform
+import numpy as np
+import pandas as pd
+from knowledge_extractor import DocumentProcessor
+from recommendations_engine import EducationalRecommender
+
+# Fragmentos para componer oraciones sintéticas en español
+SUBJECTS = [
+    "El estudiante", "La alumna", "El niño", "El grupo", "La docente", "El equipo de apoyo"
+]
+PATTERN_VERBS = ["presenta", "muestra", "exhibe", "manifiesta"]
+INTERVENTION_NOUNS = ["La intervención", "El tratamiento", "La terapia", "La estrategia"]
+RECOMMENDATION_VERBS = ["Se recomienda", "Se sugiere", "Se aconseja", "El docente debe"]
+TOPICS = [
+    "dificultades de atención", "hiperactividad en el aula", "baja concentración",
+    "procesamiento sensorial atípico", "respuestas al estímulo vestibular",
+    "falta de organización", "problemas de planificación", "impulsividad",
+    "sensibilidad táctil", "calma tras la respiración guiada"
+]
+ACTIONS = [
+    "practicar respiración consciente", "usar cojines de textura", "incorporar pausas activas",
+    "dividir las tareas en pasos", "usar temporizadores visuales", "trabajar la atención plena",
+    "establecer rutinas de movimiento", "reforzar la autoregulación", "usar listas de verificación"
+]
+FILLER = [
+    "La sesión se desarrolló con normalidad.", "Se registraron observaciones durante la semana.",
+    "La familia participó en la reunión.", "El informe se actualizará el próximo trimestre."
+]
+
+# Métricas comparadas con la línea base (mayor es peor)
+COMPARED_METRICS = ('p50_ms', 'p99_ms')
+
+
+def synthetic_sentence(rng: random.Random) -> str:
+    """Genera una oración sintética de uno de los tipos que reconoce el extractor."""
+    kind = rng.randrange(4)
+    if kind == 0:
+        return f"{rng.choice(SUBJECTS)} {rng.choice(PATTERN_VERBS)} {rng.choice(TOPICS)}."
+    if kind == 1:
+        return f"{rng.choice(INTERVENTION_NOUNS)} consiste en {rng.choice(ACTIONS)}."
+    if kind == 2:
+        return (f"{rng.choice(RECOMMENDATION_VERBS)} {rng.choice(ACTIONS)} "
+                f"para reducir {rng.choice(TOPICS)}.")
+    return rng.choice(FILLER)
+
+
+def synthetic_document(n_sentences: int, rng: random.Random) -> str:
+    """Genera un documento sintético de `n_sentences` oraciones en párrafos."""
+    sentences = [synthetic_sentence(rng) for _ in range(n_sentences)]
+    paragraphs = [' '.join(sentences[i:i + 8]) for i in range(0, n_sentences, 8)]
+    return '\n\n'.join(paragraphs)
+
+
+def synthetic_students(n_students: int, fields: list, seed: int) -> pd.DataFrame:
+    """Genera evaluaciones sintéticas (0-10) para `n_students` estudiantes."""
+    rng = np.random.default_rng(seed)
+    return pd.DataFrame(rng.integers(0, 11, size=(n_students, len(fields))), columns=fields)
+
+
+def summarize(samples: list, items_per_sample: int = 1, items: int = None) -> dict:
+    """Latencias (ms) en percentiles y rendimiento (elementos por segundo).
+
+    `items` es el total de elementos procesados si las muestras no tienen
+    todas `items_per_sample` (p. ej. un último lote más corto).
+    """
+    samples = np.asarray(samples)
+    total = samples.sum()
+    if items is None:
+        items = len(samples) * items_per_sample
+    return {
+        'count': int(len(samples)),
+        'mean_ms': float(samples.mean() * 1000),
+        'p50_ms': float(np.percentile(samples, 50) * 1000),
+        'p90_ms': float(np.percentile(samples, 90) * 1000),
+        'p99_ms': float(np.percentile(samples, 99) * 1000),
+        'throughput_per_s': float(items / total) if total else 0.0
+    }
+
+
+def timed(function, *args, **kwargs) -> float:
+    """Ejecuta la función y devuelve los segundos que tardó."""
+    start = time.perf_counter()
+    function(*args, **kwargs)
+    return time.perf_counter() - start
+
+
+def bench_extraction(args, rng: random.Random) -> dict:
+    """Latencia de process_document sobre documentos sintéticos."""
+    processor = DocumentProcessor(lazy=False)
+    documents = [
+        synthetic_document(args.doc_sentences, rng).encode('utf-8')
+        for _ in range(args.documents)
+    ]
+
+    # Calentamiento (modelo y cachés internas de spaCy)
+    processor.process_document(documents[0], 'txt')
+
+    samples = [timed(processor.process_document, document, 'txt') for document in documents]
+    return {
+        'process_document': summarize(samples),
+        'sentences_per_s': summarize(samples, args.doc_sentences)['throughput_per_s']
+    }
+
+
+def bench_knowledge_base(args, rng: random.Random) -> dict:
+    """update_knowledge_base y get_relevant_recommendations según crece la base."""
+    processor = DocumentProcessor()
+    queries = [f"{rng.choice(ACTIONS)} {rng.choice(TOPICS)}" for _ in range(args.queries)]
+    results = {}
+    size = 0
+    for target in sorted(set(args.kb_sizes)):
+        # Crecer la base hasta el tamaño objetivo en lotes de un documento
+        update_samples = []
+        start_size = size
+        while size < target:
+            batch = min(args.kb_batch, target - size)
+            new_knowledge = {
+                'recommendations': [f"{synthetic_sentence(rng)} (caso {size + i})"
+                                    for i in range(batch)],
+                'patterns': [synthetic_sentence(rng) for _ in range(batch)]
+            }
+            update_samples.append(timed(processor.update_knowledge_base, new_knowledge))
+            size += batch
+
+        # La primera consulta tras actualizar incorpora las filas pendientes al índice
+        first_query = timed(processor.get_relevant_recommendations, queries[0])
+        query_samples = [timed(processor.get_relevant_recommendations, query)
+                         for query in queries]
+        results[str(target)] = {
+            'first_query_ms': first_query * 1000,
+            'get_relevant_recommendations': summarize(query_samples)
+        }
+        if update_samples:
+            results[str(target)]['update_knowledge_base'] = summarize(
+                update_samples, items=size - start_size
+            )
+    return results
+
+
+def bench_recommender(args) -> dict:
+    """Recomendaciones por estudiante y en lote."""
+    recommender = EducationalRecommender()
+    students = synthetic_students(args.students, recommender.fields, args.seed)
+    records = students.to_dict('records')
+
+    recommender.get_personalized_recommendations(records[0])
+    samples = [timed(recommender.get_personalized_recommendations, record)
+               for record in records]
+
+    batch_samples = [timed(recommender.get_batch_recommendations, students)
+                     for _ in range(args.batch_repeats)]
+    return {
+        'get_personalized_recommendations': summarize(samples),
+        'get_batch_recommendations': summarize(batch_samples, len(students))
+    }
+
+
+def compare(results: dict, baseline: dict, tolerance: float, path: str = '') -> list:
+    """Lista las métricas que empeoran más de `tolerance` respecto a la línea base."""
+    regressions = []
+    for key, value in results.items():
+        if key not in baseline:
+            continue
+        name = f"{path}.{key}" if path else key
+        if isinstance(value, dict) and isinstance(baseline[key], dict):
+            regressions.extend(compare(value, baseline[key], tolerance, name))
+        elif key in COMPARED_METRICS and baseline[key] > 0:
+            ratio = value / baseline[key]
+            if ratio > 1 + tolerance:
+                regressions.append({
+                    'metric': name, 'baseline': baseline[key], 'current': value, 'ratio': ratio
+                })
+    return regressions
+
+
+def main():
+    """Ejecuta las pruebas de rendimiento y guarda los resultados en JSON."""
+    parser = argparse.ArgumentParser(description="Pruebas de rendimiento reproducibles (sin red)")
+    parser.add_argument('--only', nargs='+', choices=['extraction', 'knowledge_base', 'recommender'],
+                        default=['extraction', 'knowledge_base', 'recommender'])
+    parser.add_argument('--seed', type=int, default=42)
+    parser.add_argument('--documents', type=int, default=20, help="Documentos a procesar")
+    parser.add_argument('--doc-sentences', type=int, default=2000, help="Oraciones por documento")
+    parser.add_argument('--kb-sizes', type=int, nargs='+', default=[1000, 10000, 100000],
+                        help="Tamaños de la base en los que se mide")
+    parser.add_argument('--kb-batch', type=int, default=200, help="Oraciones por actualización")
+    parser.add_argument('--queries', type=int, default=200, help="Consultas por tamaño de base")
+    parser.add_argument('--students', type=int, default=5000, help="Estudiantes sintéticos")
+    parser.add_argument('--batch-repeats', type=int, default=5)
+    parser.add_argument('--output', default='benchmark_results.json')
+    parser.add_argument('--baseline', default=None, help="JSON de una ejecución anterior")
+    parser.add_argument('--tolerance', type=float, default=0.2,
+                        help="Empeoramiento relativo permitido respecto a la línea base")
+    args = parser.parse_args()
+
+    rng = random.Random(args.seed)
+    results = {
+        'meta': {
+            'timestamp': time.strftime('%Y-%m-%dT%H:%M:%S'),
+            'python': platform.python_version(),
+            'platform': platform.platform(),
+            'config': {key: value for key, value in vars(args).items()
+                       if key not in ('output', 'baseline')}
+        }
+    }
+    if 'extraction' in args.only:
+        results['extraction'] = bench_extraction(args, rng)
+    if 'knowledge_base' in args.only:
+        results['knowledge_base'] = bench_knowledge_base(args, rng)
+    if 'recommender' in args.only:
+        results['recommender'] = bench_recommender(args)
+
+    with open(args.output, 'w', encoding='utf-8') as file:
+        json.dump(results, file, ensure_ascii=False, indent=2)
+
+    if args.baseline:
+        with open(args.baseline, 'r', encoding='utf-8') as file:
+            baseline = json.load(file)
+        results.pop('meta')
+        regressions = compare(results, baseline, args.tolerance)
+        for regression in regressions:
+            print(f"REGRESIÓN {regression['metric']}: {regression['baseline']:.3f} -> "
+                  f"{regression['current']:.3f} ms (x{regression['ratio']:.2f})")
+        if regressions:
+            sys.exit(1)
+        print("Sin regresiones respecto a la línea base")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,119 @@
+# cue_matcher.py
+import re
+import unicodedata
+
+# Marcas diacríticas combinables (tras la descomposición NFD)
+COMBINING_MARKS = re.compile('[\u0300-\u036f]')
+WORD_CHAR = re.compile(r'\w')
+
+
+def fold_text(text: str, accent_insensitive: bool = False) -> str:
+    """Pasa a minúsculas y, opcionalmente, elimina tildes y diéresis."""
+    text = text.lower()
+    if accent_insensitive:
+        text = COMBINING_MARKS.sub('', unicodedata.normalize('NFD', text))
+        text = unicodedata.normalize('NFC', text)
+    return text
+
+
+def trie_pattern(keywords) -> str:
+    """Expresión regular en forma de árbol de prefijos para un conjunto de palabras.
+
+    Las palabras con prefijos comunes comparten ramas, de modo que el coste de
+    buscar en cada posición depende de la longitud de las palabras y no de
+    cuántas haya. Los sufijos opcionales son voraces: en cada posición se
+    encuentra la palabra más larga.
+    """
+    trie = {}
+    for keyword in keywords:
+        node = trie
+        for char in keyword:
+            node = node.setdefault(char, {})
+        node[''] = {}
+
+    def build(node: dict) -> str:
+        branches = [re.escape(char) + build(child)
+                    for char, child in sorted(node.items()) if char]
+        if not branches:
+            return ''
+        body = branches[0] if len(branches) == 1 else '(?:' + '|'.join(branches) + ')'
+        return f'(?:{body})?' if '' in node else body
+
+    return build(trie)
+
+
+class CueMatcher:
+    """Busca simultáneamente varias listas de palabras clave en una oración.
+
+    Todas las palabras se compilan en una sola expresión (ver `trie_pattern`)
+    que recorre cada oración una vez. Con `accent_insensitive=True` se ignoran
+    tildes y diéresis; con `word_boundary=True` solo cuentan palabras
+    completas (por defecto, como `keyword in sentence.lower()`).
+    """
+
+    def __init__(self, cues: dict, accent_insensitive: bool = False,
+                 word_boundary: bool = False):
+        self.accent_insensitive = accent_insensitive
+        self.word_boundary = word_boundary
+        # Palabra clave normalizada -> etiquetas (tipo de conocimiento o categoría)
+        self.labels = {}
+        for label, keywords in cues.items():
+            self._add(label, keywords)
+        self._compile()
+
+    def _add(self, label: str, keywords):
+        for keyword in keywords:
+            keyword = fold_text(keyword, self.accent_insensitive)
+            if keyword:
+                self.labels.setdefault(keyword, set()).add(label)
+
+    def _compile(self):
+        """Compila la expresión combinada y las etiquetas de cada coincidencia."""
+        # Búsqueda anticipada: en cada posición, la palabra clave más larga que empieza allí
+        if self.labels:
+            body = trie_pattern(self.labels)
+            if self.word_boundary:
+                body = rf'\b(?:{body})\b'
+            self.pattern = re.compile(f'(?=({body}))')
+        else:
+            self.pattern = re.compile(r'(?!)')
+
+        # Las palabras clave que son prefijo de la encontrada también aparecen
+        # (con límites de palabra, solo si el prefijo termina en un límite)
+        self.hits = {}
+        self.hit_labels = {}
+        for keyword in self.labels:
+            keyword_hits = {}
+            for end in range(1, len(keyword) + 1):
+                prefix = keyword[:end]
+                if prefix in self.labels and self._ends_word(keyword, end):
+                    for label in self.labels[prefix]:
+                        keyword_hits.setdefault(label, set()).add(prefix)
+            self.hits[keyword] = keyword_hits
+            self.hit_labels[keyword] = frozenset(keyword_hits)
+
+    def _ends_word(self, keyword: str, end: int) -> bool:
+        """Indica si un prefijo de `keyword` de longitud `end` puede coincidir por sí solo."""
+        if not self.word_boundary or end == len(keyword):
+            return True
+        return bool(WORD_CHAR.match(keyword[end - 1])) != bool(WORD_CHAR.match(keyword[end]))
+
+    def add_terms(self, label: str, keywords):
+        """Añade palabras clave a una etiqueta y recompila el buscador."""
+        self._add(label, keywords)
+        self._compile()
+
+    def find(self, sentence: str) -> dict:
+        """Devuelve, por etiqueta, las palabras clave encontradas en la oración."""
+        found = {}
+        for match in self.pattern.finditer(fold_text(sentence, self.accent_insensitive)):
+            for label, keywords in self.hits[match.group(1)].items():
+                found.setdefault(label, set()).update(keywords)
+        return found
+
+    def match(self, sentence: str) -> set:
+        """Devuelve todas las etiquetas cuyas palabras clave aparecen en la oración."""
+        found = set()
+        for match in self.pattern.finditer(fold_text(sentence, self.accent_insensitive)):
+            found |= self.hit_labels[match.group(1)]
+        return found
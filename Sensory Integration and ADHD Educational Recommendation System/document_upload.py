@@ -1,14 +1,120 @@
 # document_upload.py
 import streamlit as st
 from knowledge_extractor import DocumentProcessor
+from knowledge_store import KnowledgeStore
+from extraction_cache import ExtractionCache
+from processing_metrics import ProcessingMetrics
+from upload_queue import UploadQueue
+from sentence_table import SentenceTable
 import os
-import tempfile
+import atexit
+import hashlib
+import pandas as pd
+
+# Ruta de la base de conocimiento persistente
+KNOWLEDGE_DB_PATH = os.environ.get('KNOWLEDGE_DB_PATH', 'knowledge_base.db')
+
+# Tabla columnar de oraciones extraídas con su documento y página de origen
+SENTENCE_TABLE_PATH = os.environ.get('SENTENCE_TABLE_PATH', 'sentence_table')
+
+# Caché persistente de extracciones de documentos ya procesados
+EXTRACTION_CACHE_PATH = os.environ.get('EXTRACTION_CACHE_PATH', 'extraction_cache.db')
+
+# Archivo opcional donde exportar las métricas en formato Prometheus
+METRICS_PATH = os.environ.get('PROMETHEUS_METRICS_PATH')
+
+# Cola persistente de documentos pendientes de procesar y número de hilos
+UPLOAD_QUEUE_PATH = os.environ.get('UPLOAD_QUEUE_PATH', 'upload_queue.db')
+UPLOAD_WORKERS = int(os.environ.get('UPLOAD_WORKERS', '2'))
+
+# Etiquetas de los estados de los trabajos
+JOB_STATUS_LABELS = {
+    'queued': '⏳ En cola',
+    'running': '⚙️ Procesando',
+    'done': '✅ Procesado',
+    'failed': '❌ Error'
+}
+
+@st.cache_resource
+def get_document_processor():
+    """Procesador compartido por todas las sesiones (el modelo se carga una vez)."""
+    processor = DocumentProcessor(
+        store=KnowledgeStore(KNOWLEDGE_DB_PATH),
+        cache=ExtractionCache(EXTRACTION_CACHE_PATH),
+        metrics=ProcessingMetrics(),
+        sentence_table=SentenceTable(SENTENCE_TABLE_PATH)
+    )
+    # Al detener el servidor se guarda el índice de recomendaciones de la base
+    atexit.register(processor.close)
+    return processor
+
+@st.cache_resource
+def get_upload_queue():
+    """Cola de procesamiento en segundo plano compartida por todas las sesiones."""
+    upload_queue = UploadQueue(get_document_processor(), UPLOAD_QUEUE_PATH, workers=UPLOAD_WORKERS)
+    # Se registra después que el procesador, así que se cierra antes que la base
+    atexit.register(upload_queue.close)
+    return upload_queue
+
+def show_extracted_knowledge(extracted_knowledge):
+    """Muestra los primeros elementos extraídos de un documento."""
+    # Mostrar patrones encontrados
+    if extracted_knowledge['patterns']:
+        st.write("**Patrones Identificados:**")
+        for pattern in extracted_knowledge['patterns'][:5]:
+            st.write(f"- {pattern}")
+
+    # Mostrar intervenciones
+    if extracted_knowledge['interventions']:
+        st.write("**Intervenciones Extraídas:**")
+        for intervention in extracted_knowledge['interventions'][:5]:
+            st.write(f"- {intervention}")
+
+    # Mostrar recomendaciones
+    if extracted_knowledge['recommendations']:
+        st.write("**Recomendaciones:**")
+        for rec in extracted_knowledge['recommendations'][:5]:
+            st.write(f"- {rec}")
+
+@st.fragment(run_every=1.0)
+def render_upload_jobs():
+    """Estado de los documentos de la sesión; se refresca solo, sin bloquear la página."""
+    upload_queue = get_upload_queue()
+    jobs = upload_queue.jobs(st.session_state['upload_jobs'].values())
+    if not jobs:
+        return
+
+    st.write("### Documentos Cargados:")
+    for job in jobs:
+        label = JOB_STATUS_LABELS[job['status']]
+        st.progress(job['progress'], text=f"{job['name']} · {label}")
+
+        if job['status'] == 'failed':
+            st.error(f"❌ Error procesando {job['name']}: {job['error']}")
+            if st.button("Reintentar", key=f"retry_{job['id']}"):
+                upload_queue.retry(job['id'])
+
+        # Resultados finales o, mientras se procesa o si falló, lo extraído hasta ahora
+        if job['result']:
+            title = f"📄 {job['name']}"
+            if job['status'] != 'done':
+                title += " (resultados parciales)"
+            with st.expander(title):
+                show_extracted_knowledge(job['result'])
+
+    # Al terminar algún trabajo, refrescar la página completa (estadísticas, métricas)
+    finished = {job['id'] for job in jobs if job['status'] in ('done', 'failed')}
+    if finished - st.session_state['finished_jobs']:
+        st.session_state['finished_jobs'] |= finished
+        if METRICS_PATH:
+            get_document_processor().metrics.write_prometheus(METRICS_PATH)
+        st.rerun()
 
 def render_document_upload():
     st.header("📚 Gestión de Base de Conocimiento")
     
-    # Inicializar procesador de documentos
-    doc_processor = DocumentProcessor()
+    # Procesador compartido sobre la base persistente
+    doc_processor = get_document_processor()
     
     # Sección de carga de documentos
     st.subheader("Cargar Nuevos Documentos")
@@ -18,50 +124,23 @@ def render_document_upload():
         accept_multiple_files=True
     )
     
-    if uploaded_files:
-        st.write("### Documentos Cargados:")
-        
-        for uploaded_file in uploaded_files:
-            # Crear archivo temporal
-            with tempfile.NamedTemporaryFile(delete=False, suffix=f".{uploaded_file.name.split('.')[-1]}") as tmp_file:
-                tmp_file.write(uploaded_file.getvalue())
-                tmp_path = tmp_file.name
-            
-            try:
-                # Procesar documento
-                with st.spinner(f'Procesando {uploaded_file.name}...'):
-                    file_type = uploaded_file.name.split('.')[-1]
-                    extracted_knowledge = doc_processor.process_document(tmp_path, file_type)
-                
-                # Mostrar resultados del procesamiento
-                with st.expander(f"📄 {uploaded_file.name}"):
-                    # Mostrar patrones encontrados
-                    if extracted_knowledge['patterns']:
-                        st.write("**Patrones Identificados:**")
-                        for pattern in extracted_knowledge['patterns'][:5]:
-                            st.write(f"- {pattern}")
-                    
-                    # Mostrar intervenciones
-                    if extracted_knowledge['interventions']:
-                        st.write("**Intervenciones Extraídas:**")
-                        for intervention in extracted_knowledge['interventions'][:5]:
-                            st.write(f"- {intervention}")
-                    
-                    # Mostrar recomendaciones
-                    if extracted_knowledge['recommendations']:
-                        st.write("**Recomendaciones:**")
-                        for rec in extracted_knowledge['recommendations'][:5]:
-                            st.write(f"- {rec}")
-                
-                st.success(f"✅ {uploaded_file.name} procesado exitosamente")
-            
-            except Exception as e:
-                st.error(f"❌ Error procesando {uploaded_file.name}: {str(e)}")
-            
-            finally:
-                # Limpiar archivo temporal
-                os.unlink(tmp_path)
-    
+    # Trabajos de esta sesión: (nombre, huella del contenido) -> identificador
+    st.session_state.setdefault('upload_jobs', {})
+    st.session_state.setdefault('finished_jobs', set())
+
+    # Encolar los documentos nuevos; se procesan en segundo plano
+    upload_queue = get_upload_queue()
+    for uploaded_file in uploaded_files or []:
+        file_bytes = uploaded_file.getvalue()
+        job_key = (uploaded_file.name, hashlib.blake2b(file_bytes, digest_size=16).hexdigest())
+        if job_key not in st.session_state['upload_jobs']:
+            file_type = uploaded_file.name.split('.')[-1].lower()
+            st.session_state['upload_jobs'][job_key] = upload_queue.submit(
+                uploaded_file.name, file_type, file_bytes
+            )
+
+    render_upload_jobs()
+
     # Mostrar estadísticas de la base de conocimiento
     st.subheader("📊 Estadísticas de la Base de Conocimiento")
     col1, col2, col3, col4 = st.columns(4)
@@ -76,5 +155,30 @@ def render_document_upload():
         total_items = sum(len(items) for items in doc_processor.knowledge_base.values())
         st.metric("Total Items", total_items)
 
+    # Uso de la caché de extracciones
+    cache_stats = doc_processor.cache.stats()
+    st.caption(
+        f"Caché de extracciones: {cache_stats['hits']} aciertos, "
+        f"{cache_stats['misses']} fallos, {cache_stats['entries']} documentos "
+        f"({cache_stats['size_bytes'] / 1024 / 1024:.1f} MB)"
+    )
+    sentence_table = doc_processor.sentence_table
+    st.caption(
+        f"Tabla de oraciones: {len(sentence_table)} oraciones de "
+        f"{len(sentence_table.sources)} documentos, con su página de origen"
+    )
+
+    # Resumen de rendimiento por etapa
+    with st.expander("⏱️ Rendimiento del procesamiento"):
+        summary = doc_processor.metrics.summary()
+        counters = summary['counters']
+        st.write(
+            f"Documentos: {counters['documents']} · Páginas: {counters['pages']} · "
+            f"Oraciones: {counters['sentences']} · "
+            f"Memoria máxima: {summary['peak_memory_bytes'] / 1024 / 1024:.0f} MB"
+        )
+        if summary['stages']:
+            st.dataframe(pd.DataFrame.from_dict(summary['stages'], orient='index'))
+
 if __name__ == "__main__":
     render_document_upload()
\ No newline at end of file
@@ -0,0 +1,107 @@
+# extraction_cache.py
+import json
+import time
+import zlib
+import sqlite3
+import threading
+
+# Tamaño máximo por defecto de la caché (bytes comprimidos)
+DEFAULT_MAX_BYTES = 512 * 1024 * 1024
+
+
+class ExtractionCache:
+    """Caché persistente de resultados de `process_document`.
+
+    Las entradas se identifican por una clave derivada del contenido del
+    documento y de la versión del extractor y del modelo (ver
+    `DocumentProcessor.cache_key`). Cuando el tamaño total supera
+    `max_bytes` se eliminan las entradas usadas hace más tiempo (LRU).
+    """
+
+    def __init__(self, db_path: str = 'extraction_cache.db', max_bytes: int = DEFAULT_MAX_BYTES):
+        self.db_path = db_path
+        self.max_bytes = max_bytes
+        self.hits = 0
+        self.misses = 0
+        self._lock = threading.RLock()
+        self.conn = sqlite3.connect(db_path, check_same_thread=False)
+        with self._lock, self.conn:
+            self.conn.execute("PRAGMA journal_mode=WAL")
+            self.conn.executescript("""
+                CREATE TABLE IF NOT EXISTS entries (
+                    key TEXT PRIMARY KEY,
+                    value BLOB NOT NULL,
+                    size INTEGER NOT NULL,
+                    last_access REAL NOT NULL
+                );
+                CREATE INDEX IF NOT EXISTS idx_entries_last_access ON entries (last_access);
+            """)
+            self._size = self.conn.execute(
+                "SELECT COALESCE(SUM(size), 0) FROM entries"
+            ).fetchone()[0]
+
+    def get(self, key: str) -> dict:
+        """Devuelve el resultado guardado para la clave, o None si no está."""
+        with self._lock, self.conn:
+            row = self.conn.execute(
+                "SELECT value FROM entries WHERE key = ?", (key,)
+            ).fetchone()
+            if row is None:
+                self.misses += 1
+                return None
+            self.conn.execute(
+                "UPDATE entries SET last_access = ? WHERE key = ?", (time.time(), key)
+            )
+            self.hits += 1
+        return json.loads(zlib.decompress(row[0]))
+
+    def put(self, key: str, value: dict):
+        """Guarda un resultado y elimina las entradas menos usadas si hace falta."""
+        blob = zlib.compress(json.dumps(value, ensure_ascii=False).encode('utf-8'))
+        if len(blob) > self.max_bytes:
+            return
+
+        with self._lock, self.conn:
+            previous = self.conn.execute(
+                "SELECT size FROM entries WHERE key = ?", (key,)
+            ).fetchone()
+            if previous is not None:
+                self._size -= previous[0]
+            self.conn.execute(
+                "INSERT OR REPLACE INTO entries (key, value, size, last_access) VALUES (?, ?, ?, ?)",
+                (key, blob, len(blob), time.time())
+            )
+            self._size += len(blob)
+
+            # Expulsión LRU hasta volver al tamaño máximo
+            while self._size > self.max_bytes:
+                oldest = self.conn.execute(
+                    "SELECT key, size FROM entries ORDER BY last_access LIMIT 1"
+                ).fetchone()
+                self.conn.execute("DELETE FROM entries WHERE key = ?", (oldest[0],))
+                self._size -= oldest[1]
+
+    def stats(self) -> dict:
+        """Aciertos, fallos y ocupación de la caché."""
+        with self._lock:
+            entries = self.conn.execute("SELECT COUNT(*) FROM entries").fetchone()[0]
+            lookups = self.hits + self.misses
+            return {
+                'hits': self.hits,
+                'misses': self.misses,
+                'hit_rate': self.hits / lookups if lookups else 0.0,
+                'entries': entries,
+                'size_bytes': self._size,
+                'max_bytes': self.max_bytes
+            }
+
+    def clear(self):
+        """Elimina todas las entradas."""
+        with self._lock, self.conn:
+            self.conn.execute("DELETE FROM entries")
+            self._size = 0
+
+    def close(self):
+        """Cierra la conexión con la base de datos."""
+        with self._lock:
+            self.conn.close()
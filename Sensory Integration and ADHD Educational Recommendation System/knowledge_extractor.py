@@ -2,24 +2,132 @@
 import PyPDF2
 import docx
 import pandas as pd
-import nltk
-from nltk.tokenize import sent_tokenize, word_tokenize
+from nltk.tokenize import word_tokenize
 from nltk.corpus import stopwords
 from nltk.stem import WordNetLemmatizer
-from sklearn.feature_extraction.text import TfidfVectorizer
-from sklearn.metrics.pairwise import cosine_similarity
 import spacy
 import re
+import os
+import json
+import hashlib
+import io
+import argparse
+import bisect
+import threading
+from contextlib import contextmanager
+from typing import BinaryIO, Union
+from concurrent.futures import ProcessPoolExecutor
+from knowledge_store import KnowledgeStore, DedupList
+from retrieval_index import RecommendationIndex
+from extraction_cache import ExtractionCache
+from processing_metrics import ProcessingMetrics, NULL_METRICS
+from cue_matcher import CueMatcher
+from sentence_table import SentenceTable
+
+
+# Modelo de spaCy y componentes innecesarios para dividir en oraciones
+SPACY_MODEL = 'es_core_news_md'
+SENTENCE_ONLY_DISABLE = ('ner', 'lemmatizer')
+
+# Versión del algoritmo de extracción: cambiarla invalida la caché de resultados
+EXTRACTOR_VERSION = '2'
+
+# Un documento puede darse como ruta, bytes en memoria o un objeto tipo archivo binario
+DocumentSource = Union[str, os.PathLike, bytes, bytearray, memoryview, BinaryIO]
+
+# Tamaño de lectura (en bytes) al decodificar texto plano
+READ_BLOCK_SIZE = 1 << 16
+
+# Tamaño (en caracteres) de los fragmentos de texto que se analizan de una vez
+CHUNK_SIZE = 100_000
+
+# Final de oración: puntuación seguida de espacio
+SENTENCE_END = re.compile(r'[.!?…]["»”)]*\s+')
+
+# Modelos ya cargados en este proceso, compartidos entre instancias
+_nlp_cache = {}
+_nlp_lock = threading.Lock()
+
+
+def load_nlp(model: str = SPACY_MODEL, disable: tuple = SENTENCE_ONLY_DISABLE):
+    """Carga el modelo de spaCy una sola vez por proceso.
+
+    Solo usa paquetes instalados localmente; nunca descarga nada.
+    """
+    key = (model, tuple(disable))
+    with _nlp_lock:
+        if key not in _nlp_cache:
+            _nlp_cache[key] = spacy.load(model, disable=list(disable))
+        return _nlp_cache[key]
+
+
+@contextmanager
+def open_source(source: DocumentSource):
+    """Abre un documento como flujo binario sin pasar por disco si ya está en memoria.
+
+    Los objetos tipo archivo recibidos no se cierran al terminar.
+    """
+    if isinstance(source, (str, os.PathLike)):
+        with open(source, 'rb') as file:
+            yield file
+    elif isinstance(source, (bytes, bytearray, memoryview)):
+        yield io.BytesIO(source)
+    else:
+        yield source
+
+
+def source_name(source: DocumentSource) -> str:
+    """Nombre del documento de origen, si se puede deducir."""
+    if isinstance(source, (str, os.PathLike)):
+        return os.path.basename(source)
+    name = getattr(source, 'name', None)
+    return os.path.basename(name) if isinstance(name, str) else None
+
+
+def iter_text_chunks(parts, chunk_size: int = CHUNK_SIZE):
+    """Agrupa fragmentos de texto (p. ej. páginas) en bloques de hasta `chunk_size` caracteres.
+
+    Cada bloque termina en el último final de oración que cabe en él; el
+    resto se arrastra al bloque siguiente. Si no cabe ningún final de
+    oración, se corta en el último espacio.
+    """
+    buffer = ''
+    for part in parts:
+        buffer += part
+        while len(buffer) >= chunk_size:
+            cut = 0
+            for match in SENTENCE_END.finditer(buffer, 0, chunk_size):
+                cut = match.end()
+            if not cut:
+                cut = buffer.rfind(' ', 0, chunk_size) + 1 or chunk_size
+            yield buffer[:cut]
+            buffer = buffer[cut:]
+
+    if buffer.strip():
+        yield buffer
+
 
 class DocumentProcessor:
-    def __init__(self):
-        # Inicializar NLTK y spaCy
-        nltk.download('punkt')
-        nltk.download('stopwords')
-        nltk.download('wordnet')
-        self.nlp = spacy.load('es_core_news_md')
-        self.lemmatizer = WordNetLemmatizer()
-        self.stop_words = set(stopwords.words('spanish'))
+    def __init__(self, store: KnowledgeStore = None, normalize_duplicates: bool = False,
+                 model: str = SPACY_MODEL, disable: tuple = SENTENCE_ONLY_DISABLE,
+                 lazy: bool = True, chunk_size: int = CHUNK_SIZE,
+                 cache: ExtractionCache = None, metrics: ProcessingMetrics = None,
+                 accent_insensitive: bool = False, word_boundary: bool = False,
+                 sentence_table: SentenceTable = None):
+        # spaCy y NLTK se cargan bajo demanda desde datos locales (sin descargas);
+        # por defecto solo con los componentes necesarios para dividir en oraciones
+        self.model = model
+        self.disable = tuple(disable)
+        self._nlp = None
+        self._lemmatizer = None
+        self._stop_words = None
+        self.chunk_size = chunk_size
+        self.cache = cache
+        self._cache_fingerprint = None
+        # Métricas por etapa (sin coste si no se piden)
+        self.metrics = metrics if metrics is not None else NULL_METRICS
+        if not lazy:
+            self._nlp = load_nlp(self.model, self.disable)
         
         # Categorías y términos clave para clasificación
         self.categories = {
@@ -36,33 +144,111 @@ class DocumentProcessor:
                 'concentración', 'organización', 'planificación'
             ]
         }
-        
-        # Base de conocimiento extraído
-        self.knowledge_base = {
-            'interventions': [],
-            'recommendations': [],
-            'research_evidence': [],
-            'patterns': []
+
+        # Palabras clave que identifican cada tipo de conocimiento extraído
+        self.cues = {
+            'patterns': ['presenta', 'muestra', 'exhibe', 'manifiesta'],
+            'interventions': ['intervención', 'tratamiento', 'terapia', 'estrategia'],
+            'recommendations': ['recomienda', 'sugiere', 'aconseja', 'debe']
         }
 
-    def read_pdf(self, file_path: str) -> str:
-        """Lee y extrae texto de archivos PDF."""
-        text = ""
-        with open(file_path, 'rb') as file:
+        # Buscador combinado: categorías y tipos de conocimiento en una sola expresión
+        self.matcher = CueMatcher({**self.cues, **self.categories},
+                                  accent_insensitive=accent_insensitive,
+                                  word_boundary=word_boundary)
+        
+        # Base de conocimiento extraído (persistente si se indica un almacén)
+        self.store = store
+        if store is not None:
+            self.knowledge_base = store
+        else:
+            # Listas sin duplicados (opcionalmente normalizando espacios y mayúsculas)
+            self.knowledge_base = {
+                'interventions': DedupList(normalize=normalize_duplicates),
+                'recommendations': DedupList(normalize=normalize_duplicates),
+                'research_evidence': DedupList(normalize=normalize_duplicates),
+                'patterns': DedupList(normalize=normalize_duplicates)
+            }
+            # Índice TF-IDF de recomendaciones (identificador = posición en la lista)
+            self.recommendation_index = RecommendationIndex()
+        # Tabla columnar opcional con cada oración extraída y su procedencia
+        self.sentence_table = sentence_table
+        # Varios hilos pueden procesar documentos a la vez (ver upload_queue)
+        self._lock = threading.Lock()
+
+    @property
+    def nlp(self):
+        """Modelo de spaCy, compartido entre instancias del mismo proceso."""
+        if self._nlp is None:
+            self._nlp = load_nlp(self.model, self.disable)
+        return self._nlp
+
+    @property
+    def lemmatizer(self) -> WordNetLemmatizer:
+        """Lematizador de NLTK (requiere el corpus wordnet instalado localmente)."""
+        if self._lemmatizer is None:
+            self._lemmatizer = WordNetLemmatizer()
+        return self._lemmatizer
+
+    @property
+    def stop_words(self) -> set:
+        """Palabras vacías en español (requiere el corpus stopwords instalado localmente)."""
+        if self._stop_words is None:
+            self._stop_words = set(stopwords.words('spanish'))
+        return self._stop_words
+
+    def iter_pdf_pages(self, file_path: DocumentSource, progress=None):
+        """Genera el texto de un PDF página a página.
+
+        Si se indica, `progress(páginas_leídas, total_páginas)` se llama tras cada página.
+        """
+        with open_source(file_path) as file:
             pdf_reader = PyPDF2.PdfReader(file)
-            for page in pdf_reader.pages:
-                text += page.extract_text()
-        return text
+            total = len(pdf_reader.pages)
+            for number, page in enumerate(pdf_reader.pages, 1):
+                self.metrics.count('pages')
+                text = page.extract_text() or ''
+                if progress is not None:
+                    progress(number, total)
+                yield text
 
-    def read_docx(self, file_path: str) -> str:
+    def read_pdf(self, file_path: DocumentSource) -> str:
+        """Lee y extrae texto de archivos PDF."""
+        return ''.join(self.iter_pdf_pages(file_path))
+
+    def read_docx(self, file_path: DocumentSource) -> str:
         """Lee y extrae texto de archivos Word."""
-        doc = docx.Document(file_path)
+        with open_source(file_path) as file:
+            doc = docx.Document(file)
         return " ".join([paragraph.text for paragraph in doc.paragraphs])
 
-    def read_txt(self, file_path: str) -> str:
+    def iter_txt_blocks(self, file_path: DocumentSource, progress=None):
+        """Decodifica un archivo de texto plano (UTF-8) por bloques.
+
+        Si se indica, `progress(bytes_leídos, total_bytes)` se llama tras cada bloque.
+        """
+        with open_source(file_path) as file:
+            total = None
+            if progress is not None and file.seekable():
+                start = file.tell()
+                total = file.seek(0, io.SEEK_END) - start
+                file.seek(start)
+            reader = io.TextIOWrapper(file, encoding='utf-8')
+            try:
+                while True:
+                    block = reader.read(READ_BLOCK_SIZE)
+                    if not block:
+                        return
+                    if total:
+                        progress(min(file.tell() - start, total), total)
+                    yield block
+            finally:
+                # Devolver el flujo sin cerrarlo (lo cierra quien lo abrió)
+                reader.detach()
+
+    def read_txt(self, file_path: DocumentSource) -> str:
         """Lee archivos de texto plano."""
-        with open(file_path, 'r', encoding='utf-8') as file:
-            return file.read()
+        return ''.join(self.iter_txt_blocks(file_path))
 
     def preprocess_text(self, text: str) -> str:
         """Preprocesa el texto para análisis."""
@@ -77,114 +263,482 @@ class DocumentProcessor:
         
         return ' '.join(words)
 
+    def split_sentences(self, text: str) -> list:
+        """Divide el texto en oraciones con un único análisis de spaCy."""
+        return self._doc_sentences(self.nlp(text))
+
+    def _doc_sentences(self, doc) -> list:
+        """Devuelve las oraciones no vacías de un documento ya analizado."""
+        return [sent.text.strip() for sent in doc.sents if sent.text.strip()]
+
+    def extract_knowledge(self, text: str) -> dict:
+        """Extrae patrones, intervenciones, recomendaciones y categorías en una sola pasada."""
+        return self._extract_sentences(self.split_sentences(text))
+
+    def _empty_knowledge(self) -> dict:
+        """Estructura vacía de conocimiento extraído."""
+        extracted_knowledge = {kind: [] for kind in self.cues}
+        extracted_knowledge['categorized_content'] = {
+            category: [] for category in self.categories
+        }
+        # Página de cada oración extraída (solo en documentos paginados)
+        extracted_knowledge['pages'] = {}
+        return extracted_knowledge
+
+    @staticmethod
+    def _merge_knowledge(extracted_knowledge: dict, partial: dict):
+        """Añade el conocimiento de un fragmento al del documento completo."""
+        for key, items in partial.items():
+            if key == 'categorized_content':
+                for category, sentences in items.items():
+                    extracted_knowledge[key][category].extend(sentences)
+            elif key == 'pages':
+                # Se conserva la primera página en la que aparece cada oración
+                for sentence, page in items.items():
+                    extracted_knowledge[key].setdefault(sentence, page)
+            else:
+                extracted_knowledge[key].extend(items)
+
+    def _extract_sentences(self, sentences: list) -> dict:
+        """Clasifica una secuencia de oraciones con el buscador combinado."""
+        extracted_knowledge = self._empty_knowledge()
+        self.metrics.count('sentences', len(sentences))
+
+        # Un único recorrido de oraciones con el buscador combinado
+        with self.metrics.stage('match'):
+            for sentence in sentences:
+                for label in self.matcher.match(sentence):
+                    if label in self.categories:
+                        extracted_knowledge['categorized_content'][label].append(sentence)
+                    else:
+                        extracted_knowledge[label].append(sentence)
+
+        return extracted_knowledge
+
+    def _add_pages(self, extracted_knowledge: dict, chunk: str, offset: int,
+                   sentences: list, page_starts: list):
+        """Anota la página de cada oración extraída de un bloque.
+
+        `offset` es la posición del bloque en el texto completo del documento
+        y `page_starts`, la posición en la que empieza cada página.
+        """
+        extracted = set()
+        for key, items in extracted_knowledge.items():
+            if key == 'categorized_content':
+                for category_sentences in items.values():
+                    extracted.update(category_sentences)
+            elif key != 'pages':
+                extracted.update(items)
+
+        pages = extracted_knowledge['pages']
+        position = 0
+        for sentence in sentences:
+            found = chunk.find(sentence, position)
+            if found < 0:
+                continue
+            position = found + len(sentence)
+            if sentence in extracted:
+                pages.setdefault(sentence, bisect.bisect_right(page_starts, offset + found))
+
+    def extraction_config(self) -> dict:
+        """Configuración que determina el resultado de la extracción (serializable).
+
+        Permite crear procesadores equivalentes en otros procesos (ver
+        `process_documents`) con `from_extraction_config`.
+        """
+        return {
+            'model': self.model,
+            'disable': self.disable,
+            'chunk_size': self.chunk_size,
+            'accent_insensitive': self.matcher.accent_insensitive,
+            'word_boundary': self.matcher.word_boundary,
+            'cues': {kind: list(terms) for kind, terms in self.cues.items()},
+            'categories': {category: list(terms) for category, terms in self.categories.items()}
+        }
+
+    @classmethod
+    def from_extraction_config(cls, config: dict, **kwargs) -> 'DocumentProcessor':
+        """Crea un procesador que extrae igual que el que generó `config`."""
+        processor = cls(model=config['model'], disable=config['disable'],
+                        chunk_size=config['chunk_size'],
+                        accent_insensitive=config['accent_insensitive'],
+                        word_boundary=config['word_boundary'], **kwargs)
+        processor.cues = config['cues']
+        processor.categories = config['categories']
+        processor.matcher = CueMatcher({**processor.cues, **processor.categories},
+                                       accent_insensitive=config['accent_insensitive'],
+                                       word_boundary=config['word_boundary'])
+        return processor
+
+    def add_category_terms(self, category: str, terms: list):
+        """Añade términos a una categoría (nueva o existente) del buscador."""
+        self.categories.setdefault(category, []).extend(terms)
+        self.matcher.add_terms(category, terms)
+        self._cache_fingerprint = None
+
     def extract_patterns(self, text: str) -> list:
         """Extrae patrones de comportamiento y síntomas."""
-        doc = self.nlp(text)
-        patterns = []
-        
-        # Buscar patrones usando spaCy
-        for sent in doc.sents:
-            # Identificar oraciones que describen patrones
-            if any(word in sent.text.lower() for word in 
-                  ['presenta', 'muestra', 'exhibe', 'manifiesta']):
-                patterns.append(sent.text.strip())
-        
-        return patterns
+        return self.extract_knowledge(text)['patterns']
 
     def extract_interventions(self, text: str) -> list:
         """Extrae intervenciones y tratamientos mencionados."""
-        doc = self.nlp(text)
-        interventions = []
-        
-        # Buscar intervenciones usando spaCy
-        for sent in doc.sents:
-            # Identificar oraciones que describen intervenciones
-            if any(word in sent.text.lower() for word in 
-                  ['intervención', 'tratamiento', 'terapia', 'estrategia']):
-                interventions.append(sent.text.strip())
-        
-        return interventions
+        return self.extract_knowledge(text)['interventions']
 
     def extract_recommendations(self, text: str) -> list:
         """Extrae recomendaciones específicas."""
-        doc = self.nlp(text)
-        recommendations = []
-        
-        # Buscar recomendaciones usando spaCy
-        for sent in doc.sents:
-            # Identificar oraciones que contienen recomendaciones
-            if any(word in sent.text.lower() for word in 
-                  ['recomienda', 'sugiere', 'aconseja', 'debe']):
-                recommendations.append(sent.text.strip())
-        
-        return recommendations
+        return self.extract_knowledge(text)['recommendations']
 
     def categorize_content(self, text: str) -> dict:
         """Categoriza el contenido según las áreas definidas."""
-        categorized_content = {}
-        
-        for category, keywords in self.categories.items():
-            category_content = []
-            for sentence in sent_tokenize(text):
-                if any(keyword in sentence.lower() for keyword in keywords):
-                    category_content.append(sentence)
-            categorized_content[category] = category_content
-        
-        return categorized_content
+        return self.extract_knowledge(text)['categorized_content']
+
+    def read_document(self, file_path: DocumentSource, file_type: str) -> str:
+        """Lee el documento según su tipo.
 
-    def process_document(self, file_path: str, file_type: str) -> dict:
-        """Procesa el documento y extrae conocimiento estructurado."""
-        # Leer documento según tipo
+        `file_path` puede ser una ruta, bytes/memoryview o un objeto tipo archivo.
+        """
         if file_type == 'pdf':
-            text = self.read_pdf(file_path)
+            return self.read_pdf(file_path)
         elif file_type == 'docx':
-            text = self.read_docx(file_path)
+            return self.read_docx(file_path)
         elif file_type == 'txt':
-            text = self.read_txt(file_path)
+            return self.read_txt(file_path)
         else:
             raise ValueError("Tipo de archivo no soportado")
 
-        # Preprocesar texto
-        processed_text = self.preprocess_text(text)
+    def iter_document_text(self, file_path: DocumentSource, file_type: str, progress=None,
+                           page_starts: list = None):
+        """Genera el texto del documento en bloques que terminan en final de oración.
 
-        # Extraer conocimiento
-        extracted_knowledge = {
-            'patterns': self.extract_patterns(text),
-            'interventions': self.extract_interventions(text),
-            'recommendations': self.extract_recommendations(text),
-            'categorized_content': self.categorize_content(text)
-        }
+        Los PDF se leen página a página y el texto plano se decodifica por
+        bloques, sin cargar el documento completo. `progress(hecho, total)`
+        informa de la parte del documento leída (páginas o bytes). Si se da la
+        lista `page_starts`, se le añade la posición en la que empieza cada
+        página leída.
+        """
+        if file_type == 'pdf':
+            parts = self.iter_pdf_pages(file_path, progress)
+            if page_starts is not None:
+                parts = self._track_pages(parts, page_starts)
+        elif file_type == 'txt':
+            parts = self.iter_txt_blocks(file_path, progress)
+        else:
+            parts = [self.read_document(file_path, file_type)]
+            if progress is not None:
+                progress(1, 1)
+        return self.metrics.timed_iter('read', iter_text_chunks(parts, self.chunk_size))
+
+    @staticmethod
+    def _track_pages(pages, page_starts: list):
+        """Recorre las páginas anotando en `page_starts` dónde empieza cada una."""
+        position = 0
+        for text in pages:
+            page_starts.append(position)
+            position += len(text)
+            yield text
+
+    def iter_extract(self, file_path: DocumentSource, file_type: str, progress=None):
+        """Extrae conocimiento bloque a bloque, devolviendo resultados parciales.
+
+        No modifica la base de conocimiento.
+        """
+        page_starts = []
+        offset = 0
+        for chunk in self.iter_document_text(file_path, file_type, progress, page_starts):
+            with self.metrics.stage('parse'):
+                sentences = self.split_sentences(chunk)
+            partial = self._extract_sentences(sentences)
+            if page_starts:
+                self._add_pages(partial, chunk, offset, sentences, page_starts)
+            offset += len(chunk)
+            yield partial
+
+    def extract_documents(self, documents: list, batch_size: int = 8) -> list:
+        """Lee y extrae conocimiento de varios documentos usando nlp.pipe.
+
+        `documents` es una lista de tuplas (ruta, tipo). No modifica la base
+        de conocimiento; los resultados se devuelven en el mismo orden.
+        """
+        def chunks():
+            for position, (file_path, file_type) in enumerate(documents):
+                page_starts = []
+                offset = 0
+                for chunk in self.iter_document_text(file_path, file_type,
+                                                     page_starts=page_starts):
+                    yield chunk, (position, offset, page_starts)
+                    offset += len(chunk)
+
+        results = [self._empty_knowledge() for _ in documents]
+        # La lectura ocurre dentro de nlp.pipe; su tiempo se descuenta del análisis
+        docs = self.metrics.timed_iter(
+            'parse', self.nlp.pipe(chunks(), batch_size=batch_size, as_tuples=True)
+        )
+        for doc, (position, offset, page_starts) in docs:
+            sentences = self._doc_sentences(doc)
+            partial = self._extract_sentences(sentences)
+            if page_starts:
+                self._add_pages(partial, doc.text, offset, sentences, page_starts)
+            self._merge_knowledge(results[position], partial)
+        self.metrics.count('documents', len(documents))
+        return results
+
+    @property
+    def cache_fingerprint(self) -> str:
+        """Huella de la configuración de extracción (versión, modelo y palabras clave)."""
+        if self._cache_fingerprint is None:
+            config = {
+                'extractor': EXTRACTOR_VERSION,
+                'model': self.model,
+                'model_version': spacy.util.get_package_version(self.model),
+                'disable': sorted(self.disable),
+                'chunk_size': self.chunk_size,
+                'cues': self.cues,
+                'categories': self.categories,
+                'accent_insensitive': self.matcher.accent_insensitive,
+                'word_boundary': self.matcher.word_boundary
+            }
+            self._cache_fingerprint = hashlib.sha256(
+                json.dumps(config, sort_keys=True, ensure_ascii=False).encode('utf-8')
+            ).hexdigest()
+        return self._cache_fingerprint
+
+    def cache_key(self, file_path: DocumentSource, file_type: str) -> tuple:
+        """Clave de caché del documento: hash del contenido + tipo + configuración.
+
+        Devuelve también la fuente a procesar, que puede ser una copia en
+        memoria si el objeto recibido no permite volver al inicio.
+        """
+        digest = hashlib.sha256()
+        if isinstance(file_path, (bytes, bytearray, memoryview)):
+            digest.update(file_path)
+        elif isinstance(file_path, (str, os.PathLike)) or file_path.seekable():
+            with open_source(file_path) as file:
+                start = file.tell()
+                for block in iter(lambda: file.read(READ_BLOCK_SIZE), b''):
+                    digest.update(block)
+                file.seek(start)
+        else:
+            file_path = file_path.read()
+            digest.update(file_path)
+
+        key = f"{digest.hexdigest()}:{file_type}:{self.cache_fingerprint}"
+        return key, file_path
+
+    def process_document(self, file_path: DocumentSource, file_type: str, source: str = None,
+                         progress=None) -> dict:
+        """Procesa el documento y extrae conocimiento estructurado.
+
+        `file_path` puede ser una ruta o el contenido en memoria (bytes,
+        memoryview u objeto tipo archivo). `source` identifica el documento de
+        origen en la base persistente (por defecto, el nombre del archivo).
+        Si se indica, `progress(fracción_leída, conocimiento_parcial)` se llama
+        tras analizar cada bloque del documento.
+        """
+        if source is None:
+            source = source_name(file_path)
+
+        # Reutilizar el resultado de un documento idéntico ya procesado
+        extracted_knowledge = None
+        if self.cache is not None:
+            with self.metrics.stage('cache'):
+                key, file_path = self.cache_key(file_path, file_type)
+                extracted_knowledge = self.cache.get(key)
+
+        if extracted_knowledge is None:
+            # Leer y extraer conocimiento bloque a bloque (un solo análisis del texto)
+            extracted_knowledge = self._empty_knowledge()
+            read = [0.0]
+
+            def read_progress(done, total):
+                read[0] = done / total
+
+            for partial in self.iter_extract(file_path, file_type,
+                                             read_progress if progress is not None else None):
+                self._merge_knowledge(extracted_knowledge, partial)
+                if progress is not None:
+                    progress(read[0], extracted_knowledge)
+            if self.cache is not None:
+                self.cache.put(key, extracted_knowledge)
+
+        if progress is not None:
+            progress(1.0, extracted_knowledge)
 
         # Actualizar base de conocimiento
-        self.update_knowledge_base(extracted_knowledge)
+        with self.metrics.stage('knowledge_base'):
+            self.update_knowledge_base(extracted_knowledge, source=source)
+        self.metrics.count('documents')
 
         return extracted_knowledge
 
-    def update_knowledge_base(self, new_knowledge: dict):
+    def update_knowledge_base(self, new_knowledge: dict, source: str = None):
         """Actualiza la base de conocimiento con nueva información."""
-        for key in self.knowledge_base.keys():
-            if key in new_knowledge:
-                self.knowledge_base[key].extend(new_knowledge[key])
-        
-        # Eliminar duplicados
-        for key in self.knowledge_base.keys():
-            self.knowledge_base[key] = list(set(self.knowledge_base[key]))
+        if self.sentence_table is not None:
+            with self.metrics.stage('sentence_table'):
+                self.sentence_table.append_knowledge(new_knowledge, source=source)
+
+        if self.store is not None:
+            self.store.update_knowledge_base(new_knowledge, source=source)
+            return
+
+        # Las listas descartan duplicados al insertar, conservando el orden
+        with self._lock:
+            for key in self.knowledge_base.keys():
+                if key in new_knowledge:
+                    added = self.knowledge_base[key].extend(new_knowledge[key])
+                    if key == 'recommendations' and added:
+                        end = len(self.knowledge_base[key])
+                        self.recommendation_index.add(range(end - len(added), end), added)
+
+    def close(self):
+        """Guarda el índice de la base persistente y cierra la base y la caché."""
+        if self.store is not None:
+            self.store.close()
+        if self.cache is not None:
+            self.cache.close()
+
+    def knowledge_since(self, kind: str, version: int = 0) -> tuple:
+        """Elementos de un tipo añadidos a la base después de `version`.
+
+        La versión es el último identificador de la base persistente o, en
+        memoria, la longitud de la lista. Devuelve la nueva versión y los textos.
+        """
+        if self.store is not None:
+            return self.store.items_since(kind, version)
+        with self._lock:
+            items = self.knowledge_base[kind]
+            return len(items), list(items[version:])
 
     def get_relevant_recommendations(self, query: str, top_n: int = 5) -> list:
         """Obtiene recomendaciones relevantes basadas en una consulta."""
-        # Vectorizar la consulta y las recomendaciones
-        vectorizer = TfidfVectorizer()
+        if self.store is not None:
+            return self.store.get_relevant_recommendations(query, top_n)
+
+        # Consultar el índice TF-IDF mantenido al actualizar la base
         recommendations = self.knowledge_base['recommendations']
-        
-        if not recommendations:
-            return []
-            
-        tfidf_matrix = vectorizer.fit_transform([query] + recommendations)
-        
-        # Calcular similitud
-        similarities = cosine_similarity(tfidf_matrix[0:1], tfidf_matrix[1:])
-        
-        # Obtener las recomendaciones más relevantes
-        top_indices = similarities[0].argsort()[-top_n:][::-1]
-        
-        return [recommendations[i] for i in top_indices]
\ No newline at end of file
+        with self._lock:
+            return [recommendations[i]
+                    for i in self.recommendation_index.query(query, top_n)]
+
+
+# Procesador de cada proceso del pool (el modelo se carga una sola vez por proceso)
+_worker_processor = None
+
+
+def _init_worker(config: dict, with_metrics: bool = False):
+    """Inicializa el procesador de documentos de un proceso del pool.
+
+    `config` es la configuración del procesador que reparte el trabajo, de
+    modo que todos los procesos extraen igual que él. Con `with_metrics`, el
+    proceso mide sus etapas y devuelve las métricas de cada lote.
+    """
+    global _worker_processor
+    _worker_processor = DocumentProcessor.from_extraction_config(
+        config, lazy=False, metrics=ProcessingMetrics() if with_metrics else None
+    )
+
+
+def _extract_chunk(args: tuple) -> tuple:
+    """Extrae conocimiento de un lote de documentos dentro de un proceso del pool.
+
+    Devuelve los resultados y las métricas del lote (None si no se miden).
+    """
+    documents, batch_size = args
+    metrics = _worker_processor.metrics
+    if metrics.enabled:
+        metrics.reset()
+    results = _worker_processor.extract_documents(documents, batch_size=batch_size)
+    return results, metrics.summary() if metrics.enabled else None
+
+
+def process_documents(paths: list, workers: int = None, batch_size: int = 8,
+                      processor: DocumentProcessor = None) -> list:
+    """Procesa muchos documentos en paralelo con un pool de procesos.
+
+    El tipo de cada documento se deduce de su extensión. Los resultados se
+    incorporan a la base de conocimiento de `processor` en el orden de `paths`,
+    de modo que el resultado es determinista sea cual sea `workers`. Las
+    métricas de los procesos del pool se suman a las de `processor`.
+    """
+    if processor is None:
+        processor = DocumentProcessor()
+
+    documents = [(path, os.path.splitext(path)[1].lstrip('.').lower())
+                 for path in paths]
+
+    if workers is None:
+        workers = os.cpu_count() or 1
+
+    if workers <= 1:
+        results = processor.extract_documents(documents, batch_size=batch_size)
+    else:
+        chunks = [(documents[i:i + batch_size], batch_size)
+                  for i in range(0, len(documents), batch_size)]
+        results = []
+        with ProcessPoolExecutor(max_workers=workers,
+                                 initializer=_init_worker,
+                                 initargs=(processor.extraction_config(),
+                                           processor.metrics.enabled)) as executor:
+            # executor.map conserva el orden de los lotes
+            for chunk_results, chunk_metrics in executor.map(_extract_chunk, chunks):
+                results.extend(chunk_results)
+                if chunk_metrics is not None:
+                    processor.metrics.merge(chunk_metrics)
+
+    # Fusionar en la base de conocimiento en orden de entrada
+    for path, extracted_knowledge in zip(paths, results):
+        with processor.metrics.stage('knowledge_base'):
+            processor.update_knowledge_base(extracted_knowledge,
+                                            source=os.path.basename(path))
+
+    return results
+
+
+def main():
+    """Punto de entrada para la importación masiva de documentos."""
+    parser = argparse.ArgumentParser(
+        description="Importación masiva de documentos a la base de conocimiento"
+    )
+    parser.add_argument('paths', nargs='+', help="Documentos PDF, DOCX o TXT")
+    parser.add_argument('--workers', type=int, default=None,
+                        help="Número de procesos (por defecto, todos los núcleos)")
+    parser.add_argument('--batch-size', type=int, default=8,
+                        help="Documentos por lote de nlp.pipe")
+    parser.add_argument('--db', default=None,
+                        help="Base de conocimiento SQLite persistente")
+    parser.add_argument('--output', default=None,
+                        help="Archivo JSON donde guardar la base de conocimiento")
+    parser.add_argument('--sentence-table', default=None,
+                        help="Directorio de la tabla columnar de oraciones y su procedencia")
+    parser.add_argument('--metrics', default=None,
+                        help="Archivo JSON donde guardar las métricas por etapa")
+    parser.add_argument('--prometheus', default=None,
+                        help="Archivo de métricas en formato Prometheus (textfile collector)")
+    args = parser.parse_args()
+
+    store = KnowledgeStore(args.db) if args.db else None
+    sentence_table = SentenceTable(args.sentence_table) if args.sentence_table else None
+    metrics = ProcessingMetrics() if args.metrics or args.prometheus else None
+    processor = DocumentProcessor(store=store, sentence_table=sentence_table, metrics=metrics)
+    process_documents(args.paths, workers=args.workers,
+                      batch_size=args.batch_size, processor=processor)
+
+    summary = {key: len(items) for key, items in processor.knowledge_base.items()}
+    print(json.dumps(summary, ensure_ascii=False))
+
+    if args.output:
+        with open(args.output, 'w', encoding='utf-8') as file:
+            json.dump({key: list(items) for key, items in processor.knowledge_base.items()},
+                      file, ensure_ascii=False, indent=2)
+
+    if args.metrics:
+        with open(args.metrics, 'w', encoding='utf-8') as file:
+            json.dump(metrics.summary(), file, ensure_ascii=False, indent=2)
+    if args.prometheus:
+        metrics.write_prometheus(args.prometheus)
+
+    # Guardar el índice de recomendaciones para no reconstruirlo al reabrir la base
+    processor.close()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,414 @@
+# knowledge_store.py
+import os
+import sqlite3
+import hashlib
+import threading
+import numpy as np
+from collections.abc import Mapping, Sequence
+from retrieval_index import RecommendationIndex
+
+# Tipos de conocimiento que se guardan en la base
+KNOWLEDGE_KINDS = ('interventions', 'recommendations', 'research_evidence', 'patterns')
+
+
+def normalize_text(text: str) -> str:
+    """Normaliza espacios y mayúsculas para detectar casi duplicados."""
+    return ' '.join(text.lower().split())
+
+
+def content_hash(text: str, normalize: bool = False) -> bytes:
+    """Huella de 16 bytes del contenido de una oración."""
+    if normalize:
+        text = normalize_text(text)
+    return hashlib.blake2b(text.encode('utf-8'), digest_size=16).digest()
+
+
+class DedupList(Sequence):
+    """Lista sin duplicados que conserva el orden de inserción.
+
+    La pertenencia se comprueba en O(1) con la huella de cada oración, y se
+    cuenta en cuántos documentos apareció cada una. Con `normalize=True` las
+    oraciones que solo difieren en espacios o mayúsculas se consideran iguales.
+    """
+
+    def __init__(self, items=(), normalize: bool = False):
+        self.normalize = normalize
+        self._items = []
+        self._source_counts = []
+        self._positions = {}
+        self.extend(items)
+
+    def __len__(self) -> int:
+        return len(self._items)
+
+    def __getitem__(self, index):
+        return self._items[index]
+
+    def __iter__(self):
+        return iter(self._items)
+
+    def __contains__(self, text) -> bool:
+        return content_hash(text, self.normalize) in self._positions
+
+    def __repr__(self) -> str:
+        return f"DedupList({self._items!r})"
+
+    def extend(self, items) -> list:
+        """Añade las oraciones de un documento y devuelve las que eran nuevas.
+
+        Cada llamada cuenta como un único documento de origen: una oración
+        repetida dentro de `items` solo suma una vez a su contador.
+        """
+        added = []
+        seen = set()
+        for text in items:
+            key = content_hash(text, self.normalize)
+            if key in seen:
+                continue
+            seen.add(key)
+            position = self._positions.get(key)
+            if position is None:
+                self._positions[key] = len(self._items)
+                self._items.append(text)
+                self._source_counts.append(1)
+                added.append(text)
+            else:
+                self._source_counts[position] += 1
+        return added
+
+    def source_count(self, text: str) -> int:
+        """Número de documentos en los que apareció la oración."""
+        position = self._positions.get(content_hash(text, self.normalize))
+        return 0 if position is None else self._source_counts[position]
+
+
+class _KindView(Sequence):
+    """Vista de solo lectura de las oraciones de un tipo, leídas bajo demanda."""
+
+    def __init__(self, store, kind: str):
+        self.store = store
+        self.kind = kind
+
+    def __len__(self) -> int:
+        return self.store.count(self.kind)
+
+    def __getitem__(self, index):
+        if isinstance(index, slice):
+            return [self[i] for i in range(*index.indices(len(self)))]
+        if index < 0:
+            index += len(self)
+        rows = self.store._query(
+            "SELECT text FROM items WHERE kind = ? ORDER BY id LIMIT 1 OFFSET ?",
+            (self.kind, index)
+        )
+        if not rows:
+            raise IndexError(index)
+        return rows[0][0]
+
+    def __iter__(self):
+        return self.store.iter_items(self.kind)
+
+    def __contains__(self, text) -> bool:
+        return self.store.source_count(self.kind, text) > 0
+
+
+class KnowledgeStore(Mapping):
+    """Base de conocimiento persistente en SQLite.
+
+    Se comporta como el diccionario de listas de `DocumentProcessor`
+    (`store['recommendations']`) pero las oraciones viven en disco, con
+    índices por tipo, categoría y documento de origen. Los duplicados se
+    detectan por la huella del contenido (ver `DedupList`) y solo se guarda
+    el número de documentos en que aparece cada oración. La base recuerda si
+    las huellas se calcularon con `normalize`; al abrirla con otro modo se
+    recalculan y se fusionan las oraciones que pasan a ser duplicadas.
+
+    Las recomendaciones se indexan en un `RecommendationIndex` que se guarda
+    junto a la base (`<db_path>.index`) y se pone al día al abrirla, y
+    también antes de consultarlo o guardarlo si otra conexión (p. ej. la
+    importación por línea de comandos) ha escrito en la base.
+    """
+
+    def __init__(self, db_path: str = 'knowledge_base.db', kinds: tuple = KNOWLEDGE_KINDS,
+                 normalize: bool = False):
+        self.db_path = db_path
+        self.kinds = tuple(kinds)
+        self.normalize = normalize
+        # Reentrante: protege la conexión y el índice cuando varias sesiones comparten el almacén
+        self._lock = threading.RLock()
+        self.conn = sqlite3.connect(db_path, check_same_thread=False)
+        with self._lock, self.conn:
+            self.conn.execute("PRAGMA journal_mode=WAL")
+            self.conn.executescript("""
+                CREATE TABLE IF NOT EXISTS items (
+                    id INTEGER PRIMARY KEY,
+                    kind TEXT NOT NULL,
+                    text TEXT NOT NULL,
+                    source TEXT,
+                    content_hash BLOB,
+                    source_count INTEGER NOT NULL DEFAULT 1
+                );
+                CREATE TABLE IF NOT EXISTS item_categories (
+                    item_id INTEGER NOT NULL REFERENCES items (id),
+                    category TEXT NOT NULL,
+                    PRIMARY KEY (item_id, category)
+                );
+                CREATE TABLE IF NOT EXISTS meta (
+                    key TEXT PRIMARY KEY,
+                    value TEXT NOT NULL
+                );
+                CREATE INDEX IF NOT EXISTS idx_items_kind ON items (kind, id);
+                CREATE INDEX IF NOT EXISTS idx_items_source ON items (source);
+                CREATE INDEX IF NOT EXISTS idx_item_categories_category
+                    ON item_categories (category, item_id);
+            """)
+            merged = self._migrate()
+            self.conn.execute(
+                "CREATE UNIQUE INDEX IF NOT EXISTS idx_items_hash ON items (kind, content_hash)"
+            )
+
+        # Índice de recomendaciones persistido junto a la base (se reconstruye
+        # si la migración eliminó recomendaciones duplicadas)
+        self.index_path = None if db_path == ':memory:' else db_path + '.index'
+        if (self.index_path and not merged
+                and os.path.exists(os.path.join(self.index_path, 'vocabulary.json'))):
+            self.recommendation_index = RecommendationIndex.load(self.index_path)
+        else:
+            self.recommendation_index = RecommendationIndex()
+        self._catch_up_index()
+
+    def _catch_up_index(self, batch_size: int = 500):
+        """Indexa las recomendaciones de la base que faltan en el índice.
+
+        Con varios procesos escribiendo en la misma base, las filas de otro
+        pueden tener identificadores menores que los ya indexados, así que se
+        buscan los identificadores que faltan y no solo los posteriores al mayor.
+        """
+        with self._lock:
+            self._data_version = self._query("PRAGMA data_version")[0][0]
+            index = self.recommendation_index
+            if self.count('recommendations') == len(index):
+                return
+            db_ids = np.fromiter(
+                (row[0] for row in self._query(
+                    "SELECT id FROM items WHERE kind = 'recommendations' ORDER BY id"
+                )),
+                dtype=np.int64
+            )
+            missing = np.setdiff1d(db_ids, index.indexed_ids, assume_unique=True).tolist()
+            for start in range(0, len(missing), batch_size):
+                batch = missing[start:start + batch_size]
+                rows = self._query(
+                    f"SELECT id, text FROM items WHERE id IN ({', '.join('?' * len(batch))}) "
+                    "ORDER BY id",
+                    tuple(batch)
+                )
+                index.add(*zip(*rows))
+
+    def _refresh_index(self):
+        """Pone al día el índice si otra conexión ha modificado la base."""
+        with self._lock:
+            if self._query("PRAGMA data_version")[0][0] != self._data_version:
+                self._catch_up_index()
+
+    def _migrate(self) -> bool:
+        """Pone al día las huellas de contenido de bases anteriores o de otro modo.
+
+        Si la base no tiene huellas, o se calcularon sin indicar el modo o con
+        otro valor de `normalize`, se recalculan todas y se fusionan las
+        oraciones que resultan iguales (se conserva la primera, con la suma
+        de documentos de origen y todas las categorías). Devuelve si se
+        eliminó alguna recomendación.
+        """
+        columns = {row[1] for row in self.conn.execute("PRAGMA table_info(items)")}
+        if 'content_hash' not in columns:
+            self.conn.execute("ALTER TABLE items ADD COLUMN content_hash BLOB")
+            self.conn.execute(
+                "ALTER TABLE items ADD COLUMN source_count INTEGER NOT NULL DEFAULT 1"
+            )
+
+        mode = '1' if self.normalize else '0'
+        stored = self.conn.execute("SELECT value FROM meta WHERE key = 'normalize'").fetchone()
+        if stored is not None and stored[0] == mode:
+            return False
+
+        self.conn.execute("DROP INDEX IF EXISTS idx_items_hash")
+        rows = self.conn.execute("SELECT id, text FROM items").fetchall()
+        self.conn.executemany(
+            "UPDATE items SET content_hash = ? WHERE id = ?",
+            [(content_hash(text, self.normalize), item_id) for item_id, text in rows]
+        )
+
+        merged = False
+        duplicates = self.conn.execute(
+            "SELECT kind, content_hash, MIN(id), SUM(source_count) FROM items "
+            "GROUP BY kind, content_hash HAVING COUNT(*) > 1"
+        ).fetchall()
+        for kind, key, keep_id, source_count in duplicates:
+            duplicate_ids = "SELECT id FROM items WHERE kind = ? AND content_hash = ? AND id != ?"
+            params = (kind, key, keep_id)
+            self.conn.execute(
+                "INSERT OR IGNORE INTO item_categories (item_id, category) "
+                f"SELECT ?, category FROM item_categories WHERE item_id IN ({duplicate_ids})",
+                (keep_id, *params)
+            )
+            self.conn.execute(
+                f"DELETE FROM item_categories WHERE item_id IN ({duplicate_ids})", params
+            )
+            self.conn.execute(
+                "DELETE FROM items WHERE kind = ? AND content_hash = ? AND id != ?", params
+            )
+            self.conn.execute(
+                "UPDATE items SET source_count = ? WHERE id = ?", (source_count, keep_id)
+            )
+            merged = merged or kind == 'recommendations'
+
+        self.conn.execute(
+            "INSERT OR REPLACE INTO meta (key, value) VALUES ('normalize', ?)", (mode,)
+        )
+        return merged
+
+    def _query(self, sql: str, params: tuple = ()) -> list:
+        """Ejecuta una consulta de lectura y devuelve todas las filas."""
+        with self._lock:
+            return self.conn.execute(sql, params).fetchall()
+
+    def __getitem__(self, kind: str) -> _KindView:
+        if kind not in self.kinds:
+            raise KeyError(kind)
+        return _KindView(self, kind)
+
+    def __iter__(self):
+        return iter(self.kinds)
+
+    def __len__(self) -> int:
+        return len(self.kinds)
+
+    def count(self, kind: str) -> int:
+        """Número de oraciones guardadas de un tipo."""
+        return self._query("SELECT COUNT(*) FROM items WHERE kind = ?", (kind,))[0][0]
+
+    def iter_items(self, kind: str, batch_size: int = 1000):
+        """Recorre las oraciones de un tipo en orden de inserción sin cargarlas todas."""
+        last_id = 0
+        while True:
+            rows = self._query(
+                "SELECT id, text FROM items WHERE kind = ? AND id > ? ORDER BY id LIMIT ?",
+                (kind, last_id, batch_size)
+            )
+            if not rows:
+                return
+            for _, text in rows:
+                yield text
+            last_id = rows[-1][0]
+
+    def items_since(self, kind: str, version: int = 0) -> tuple:
+        """Oraciones de un tipo añadidas después de `version` (un identificador de fila).
+
+        Devuelve la nueva versión (el último identificador leído) y los textos,
+        en orden de inserción.
+        """
+        rows = self._query(
+            "SELECT id, text FROM items WHERE kind = ? AND id > ? ORDER BY id", (kind, version)
+        )
+        return (rows[-1][0] if rows else version), [text for _, text in rows]
+
+    def get_items(self, kind: str, category: str = None, source: str = None) -> list:
+        """Devuelve las oraciones de un tipo filtradas por categoría o documento."""
+        sql = "SELECT items.text FROM items"
+        params = [kind]
+        if category is not None:
+            sql += " JOIN item_categories ON item_categories.item_id = items.id"
+        sql += " WHERE items.kind = ?"
+        if category is not None:
+            sql += " AND item_categories.category = ?"
+            params.append(category)
+        if source is not None:
+            sql += " AND items.source = ?"
+            params.append(source)
+        sql += " ORDER BY items.id"
+        return [row[0] for row in self._query(sql, tuple(params))]
+
+    def source_count(self, kind: str, text: str) -> int:
+        """Número de documentos en los que apareció la oración (0 si no está)."""
+        rows = self._query(
+            "SELECT source_count FROM items WHERE kind = ? AND content_hash = ?",
+            (kind, content_hash(text, self.normalize))
+        )
+        return rows[0][0] if rows else 0
+
+    def update_knowledge_base(self, new_knowledge: dict, source: str = None):
+        """Añade a la base la información extraída de un documento.
+
+        Las oraciones ya guardadas no se duplican: solo se incrementa su
+        contador de documentos de origen (una vez por documento).
+        """
+        # Categorías de cada oración según el contenido categorizado
+        sentence_categories = {}
+        for category, sentences in new_knowledge.get('categorized_content', {}).items():
+            for sentence in sentences:
+                sentence_categories.setdefault(sentence, set()).add(category)
+
+        new_recommendations = []
+        with self._lock, self.conn:
+            for kind in self.kinds:
+                seen = set()
+                for text in new_knowledge.get(kind, []):
+                    key = content_hash(text, self.normalize)
+                    if key in seen:
+                        continue
+                    seen.add(key)
+                    cursor = self.conn.execute(
+                        "INSERT OR IGNORE INTO items (kind, text, source, content_hash) "
+                        "VALUES (?, ?, ?, ?)",
+                        (kind, text, source, key)
+                    )
+                    if cursor.rowcount:
+                        item_id = cursor.lastrowid
+                        if kind == 'recommendations':
+                            new_recommendations.append((item_id, text))
+                    else:
+                        self.conn.execute(
+                            "UPDATE items SET source_count = source_count + 1 "
+                            "WHERE kind = ? AND content_hash = ?",
+                            (kind, key)
+                        )
+                        item_id = self.conn.execute(
+                            "SELECT id FROM items WHERE kind = ? AND content_hash = ?",
+                            (kind, key)
+                        ).fetchone()[0]
+                    self.conn.executemany(
+                        "INSERT OR IGNORE INTO item_categories (item_id, category) VALUES (?, ?)",
+                        [(item_id, category)
+                         for category in sentence_categories.get(text, ())]
+                    )
+
+            if new_recommendations:
+                self.recommendation_index.add(*zip(*new_recommendations))
+
+    def get_relevant_recommendations(self, query: str, top_n: int = 5) -> list:
+        """Obtiene recomendaciones relevantes basadas en una consulta."""
+        with self._lock:
+            self._refresh_index()
+            ids = self.recommendation_index.query(query, top_n)
+        if not ids:
+            return []
+
+        placeholders = ', '.join('?' * len(ids))
+        texts = dict(self._query(
+            f"SELECT id, text FROM items WHERE id IN ({placeholders})", tuple(ids)
+        ))
+        return [texts[item_id] for item_id in ids]
+
+    def save_index(self):
+        """Guarda en disco el índice de recomendaciones."""
+        if self.index_path:
+            with self._lock:
+                self._refresh_index()
+                self.recommendation_index.save(self.index_path)
+
+    def close(self):
+        """Guarda el índice y cierra la conexión con la base de datos."""
+        self.save_index()
+        with self._lock:
+            self.conn.close()
@@ -0,0 +1,147 @@
+# knowledge_sync.py
+import threading
+from typing import Dict, List, Tuple
+from cue_matcher import CueMatcher
+from recommendations_engine import LEVELS
+
+# Categoría del extractor -> grupo de la base de conocimiento del recomendador
+CATEGORY_GROUPS = {
+    'sensory_integration': 'sensory_integration',
+    'mindfulness': 'mindfulness',
+    'adhd': 'adhd_strategies'
+}
+
+# Grupo de las recomendaciones que no corresponden a ninguna categoría del extractor
+DEFAULT_GROUP = 'general'
+
+# Palabras clave de cada categoría del recomendador
+CATEGORY_TOPICS = {
+    'cognitive': ['atención', 'concentración', 'memoria', 'distracción', 'impulsividad'],
+    'study_habits': ['organización', 'organizar', 'planificación', 'planificar',
+                     'rutina', 'agenda', 'lista', 'hábitos', 'estudio'],
+    'academic': ['lectura', 'escritura', 'matemáticas', 'ciencias', 'deberes'],
+    'social': ['social', 'compañeros', 'equipo', 'comunicación', 'empatía']
+}
+
+# Tema de la clave dentro de cada grupo (el primero es el tema por defecto). Solo
+# se usan claves que consultan las reglas de `EducationalRecommender._rule_sources`:
+# 'attention_<nivel>' en integración sensorial, 'anxiety_high' en mindfulness,
+# '<categoría>_low' (categorías del recomendador) en estrategias TDAH y
+# '<categoría>_<nivel>' o 'general_<nivel>' (cualquier categoría) en el grupo general.
+GROUP_TOPICS = {
+    'sensory_integration': {
+        'attention': []
+    },
+    'mindfulness': {
+        'anxiety': []
+    },
+    'adhd_strategies': CATEGORY_TOPICS,
+    DEFAULT_GROUP: {
+        'general': [],
+        **CATEGORY_TOPICS
+    }
+}
+
+# Niveles que admite la clave de cada grupo (el primero es el nivel por defecto)
+GROUP_BANDS = {
+    'sensory_integration': LEVELS,
+    'mindfulness': ('high',),
+    'adhd_strategies': ('low',),
+    DEFAULT_GROUP: LEVELS
+}
+
+# Nivel de la clave según la oración, si el grupo admite varios
+BAND_CUES = {
+    'low': ['bajo', 'baja', 'bajos', 'bajas', 'dificultad', 'dificultades', 'déficit', 'falta'],
+    'medium': ['moderado', 'moderada', 'moderados', 'moderadas', 'leve', 'leves', 'intermedio'],
+    'high': ['alto', 'alta', 'altos', 'altas', 'elevado', 'elevada', 'mantener', 'consolidar']
+}
+
+
+class KnowledgeSync:
+    """Lleva al recomendador las recomendaciones nuevas de la base de conocimiento extraída.
+
+    Guarda la versión hasta la que ha sincronizado (ver
+    `DocumentProcessor.knowledge_since`) y en cada `sync` clasifica solo las
+    recomendaciones añadidas después: sus categorías del extractor indican
+    el grupo del recomendador, y palabras clave de tema y nivel, una clave
+    que sus reglas consultan (p. ej. 'attention_low' o 'study_habits_low').
+    Las que no corresponden a ninguna categoría van al grupo general, para
+    no perderlas. El recomendador recibe solo esa diferencia
+    mediante `add_recommendations`, sin reiniciarse.
+    """
+
+    def __init__(self, processor, recommender, category_groups: Dict[str, str] = None,
+                 group_topics: Dict[str, Dict[str, List[str]]] = None,
+                 group_bands: Dict[str, Tuple[str, ...]] = None,
+                 band_cues: Dict[str, List[str]] = None):
+        self.processor = processor
+        self.recommender = recommender
+        self.category_groups = category_groups or CATEGORY_GROUPS
+        self.group_topics = group_topics or GROUP_TOPICS
+        self.group_bands = group_bands or GROUP_BANDS
+        self.version = 0
+        self._lock = threading.Lock()
+        self._thread = None
+        self._stop = threading.Event()
+
+        # Buscadores de temas (uno por grupo) y de niveles, sin distinguir tildes
+        self.topic_matchers = {
+            group: CueMatcher(topics, accent_insensitive=True, word_boundary=True)
+            for group, topics in self.group_topics.items()
+        }
+        self.band_matcher = CueMatcher(band_cues or BAND_CUES,
+                                       accent_insensitive=True, word_boundary=True)
+
+    def classify(self, text: str) -> List[Tuple[str, str]]:
+        """Grupos y claves del recomendador a los que corresponde una recomendación."""
+        labels = self.processor.matcher.match(text)
+        found_bands = self.band_matcher.match(text)
+
+        groups = [group for category, group in self.category_groups.items()
+                  if category in labels] or [DEFAULT_GROUP]
+        keys = []
+        for group in groups:
+            topics = self.group_topics.get(group, {})
+            matcher = self.topic_matchers.get(group)
+            found = matcher.match(text) if matcher is not None else set()
+            topic = next((name for name in topics if name in found), next(iter(topics), 'general'))
+            bands = self.group_bands.get(group, LEVELS)
+            band = next((level for level in bands if level in found_bands), bands[0])
+            keys.append((group, f"{topic}_{band}"))
+        return keys
+
+    def delta(self, texts: List[str]) -> Dict[str, Dict[str, List[str]]]:
+        """Agrupa recomendaciones en la forma {grupo: {clave: [textos]}} del recomendador."""
+        delta = {}
+        for text in texts:
+            for group, key in self.classify(text):
+                delta.setdefault(group, {}).setdefault(key, []).append(text)
+        return delta
+
+    def sync(self) -> int:
+        """Aplica al recomendador las recomendaciones nuevas; devuelve cuántas se añadieron."""
+        with self._lock:
+            version, texts = self.processor.knowledge_since('recommendations', self.version)
+            added = self.recommender.add_recommendations(self.delta(texts)) if texts else 0
+            self.version = version
+            return added
+
+    def start(self, interval: float = 60.0) -> threading.Thread:
+        """Sincroniza periódicamente desde un hilo en segundo plano."""
+        def run():
+            while not self._stop.wait(interval):
+                self.sync()
+
+        self.sync()
+        self._stop.clear()
+        self._thread = threading.Thread(target=run, daemon=True)
+        self._thread.start()
+        return self._thread
+
+    def stop(self):
+        """Detiene la sincronización periódica."""
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join()
+            self._thread = None
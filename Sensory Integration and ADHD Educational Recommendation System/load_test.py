@@ -0,0 +1,88 @@
+# load_test.py
+import sys
+import json
+import time
+import argparse
+import urllib.error
+import urllib.request
+import numpy as np
+from concurrent.futures import ThreadPoolExecutor
+from benchmark import summarize
+
+
+def fetch_json(url: str, data: bytes = None, timeout: float = 30) -> dict:
+    """GET (o POST si hay `data`) y respuesta decodificada como JSON."""
+    request = urllib.request.Request(url, data=data,
+                                     headers={'Content-Type': 'application/json'})
+    with urllib.request.urlopen(request, timeout=timeout) as response:
+        return json.loads(response.read())
+
+
+def synthetic_payloads(fields: list, n_requests: int, batch_size: int, seed: int) -> list:
+    """Cuerpos JSON de lotes de evaluaciones sintéticas (0-10), generados antes de medir."""
+    rng = np.random.default_rng(seed)
+    payloads = []
+    for _ in range(n_requests):
+        values = rng.integers(0, 11, size=(batch_size, len(fields))).tolist()
+        students = [dict(zip(fields, row)) for row in values]
+        payloads.append(json.dumps({'students': students}).encode('utf-8'))
+    return payloads
+
+
+def run(url: str, payloads: list, concurrency: int) -> tuple:
+    """Envía las peticiones con `concurrency` clientes; devuelve latencias y errores."""
+    def send(payload):
+        start = time.perf_counter()
+        try:
+            fetch_json(f"{url}/recommendations", payload)
+        except (urllib.error.URLError, OSError):
+            return None
+        return time.perf_counter() - start
+
+    with ThreadPoolExecutor(max_workers=concurrency) as executor:
+        results = list(executor.map(send, payloads))
+    latencies = [latency for latency in results if latency is not None]
+    return latencies, len(results) - len(latencies)
+
+
+def main():
+    """Prueba de carga local contra `serve.py`."""
+    parser = argparse.ArgumentParser(description="Prueba de carga del servidor de recomendaciones")
+    parser.add_argument('--url', default='http://127.0.0.1:8000')
+    parser.add_argument('--requests', type=int, default=1000, help="Peticiones a enviar")
+    parser.add_argument('--concurrency', type=int, default=16, help="Clientes simultáneos")
+    parser.add_argument('--batch-size', type=int, default=32, help="Estudiantes por petición")
+    parser.add_argument('--seed', type=int, default=42)
+    parser.add_argument('--output', default=None, help="Archivo JSON donde guardar el resultado")
+    args = parser.parse_args()
+
+    fields = fetch_json(f"{args.url}/health")['fields']
+    payloads = synthetic_payloads(fields, args.requests, args.batch_size, args.seed)
+
+    # Calentamiento
+    run(args.url, payloads[:args.concurrency], args.concurrency)
+
+    start = time.perf_counter()
+    latencies, errors = run(args.url, payloads, args.concurrency)
+    elapsed = time.perf_counter() - start
+    if not latencies:
+        print("Ninguna petición tuvo éxito")
+        sys.exit(1)
+
+    results = {
+        'config': vars(args),
+        'client': summarize(latencies, args.batch_size),
+        'errors': errors,
+        'requests_per_s': len(latencies) / elapsed,
+        'students_per_s': len(latencies) * args.batch_size / elapsed,
+        'server': fetch_json(f"{args.url}/stats")
+    }
+    print(json.dumps(results, ensure_ascii=False, indent=2))
+
+    if args.output:
+        with open(args.output, 'w', encoding='utf-8') as file:
+            json.dump(results, file, ensure_ascii=False, indent=2)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,198 @@
+# processing_metrics.py
+import os
+import sys
+import time
+import threading
+from contextlib import contextmanager, nullcontext
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+try:
+    import resource
+except ImportError:  # Windows
+    resource = None
+
+# Prefijo de las métricas exportadas en formato Prometheus
+METRIC_PREFIX = 'docproc'
+
+
+def peak_memory_bytes() -> int:
+    """Memoria residente máxima del proceso (0 si el sistema no la informa)."""
+    if resource is None:
+        return 0
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # Linux informa en KiB; macOS, en bytes
+    return peak if sys.platform == 'darwin' else peak * 1024
+
+
+class ProcessingMetrics:
+    """Tiempos por etapa, memoria máxima y contadores del procesamiento de documentos.
+
+    Cada etapa acumula tiempo de reloj y de CPU exclusivos: si una etapa se
+    ejecuta dentro de otra, su tiempo se descuenta de la exterior. El tiempo de
+    CPU es el del proceso completo (incluye otros hilos).
+    """
+
+    enabled = True
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._local = threading.local()
+        self.hooks = []
+        self.reset()
+
+    def reset(self):
+        """Pone a cero todas las métricas."""
+        with self._lock:
+            self.stages = {}
+            self.counters = {'documents': 0, 'pages': 0, 'sentences': 0}
+            self.peak_memory_bytes = peak_memory_bytes()
+
+    def add_hook(self, hook):
+        """Registra `hook(metrics, stage, wall_seconds, cpu_seconds)`, llamado al cerrar cada etapa."""
+        self.hooks.append(hook)
+
+    @contextmanager
+    def stage(self, name: str):
+        """Mide una etapa del procesamiento."""
+        stack = getattr(self._local, 'stack', None)
+        if stack is None:
+            stack = self._local.stack = []
+        # Tiempo acumulado por las etapas anidadas (reloj, CPU)
+        stack.append([0.0, 0.0])
+        wall_start = time.perf_counter()
+        cpu_start = time.process_time()
+        try:
+            yield
+        finally:
+            wall = time.perf_counter() - wall_start
+            cpu = time.process_time() - cpu_start
+            child_wall, child_cpu = stack.pop()
+            if stack:
+                stack[-1][0] += wall
+                stack[-1][1] += cpu
+
+            exclusive_wall = wall - child_wall
+            exclusive_cpu = cpu - child_cpu
+            with self._lock:
+                stats = self.stages.setdefault(
+                    name, {'calls': 0, 'wall_seconds': 0.0, 'cpu_seconds': 0.0}
+                )
+                stats['calls'] += 1
+                stats['wall_seconds'] += exclusive_wall
+                stats['cpu_seconds'] += exclusive_cpu
+                self.peak_memory_bytes = max(self.peak_memory_bytes, peak_memory_bytes())
+            for hook in self.hooks:
+                hook(self, name, exclusive_wall, exclusive_cpu)
+
+    def timed_iter(self, name: str, iterable):
+        """Recorre `iterable` midiendo como etapa el tiempo de producir cada elemento."""
+        iterator = iter(iterable)
+        while True:
+            with self.stage(name):
+                try:
+                    item = next(iterator)
+                except StopIteration:
+                    return
+            yield item
+
+    def count(self, name: str, value: int = 1):
+        """Incrementa un contador (documentos, páginas, oraciones...)."""
+        with self._lock:
+            self.counters[name] = self.counters.get(name, 0) + value
+
+    def merge(self, summary: dict):
+        """Suma las métricas de un `summary()` de otro proceso (p. ej. del pool).
+
+        Tiempos, ejecuciones y contadores se suman; la memoria máxima es la
+        mayor de la de cualquier proceso.
+        """
+        with self._lock:
+            for name, other in summary['stages'].items():
+                stats = self.stages.setdefault(
+                    name, {'calls': 0, 'wall_seconds': 0.0, 'cpu_seconds': 0.0}
+                )
+                for field, value in other.items():
+                    stats[field] += value
+            for name, value in summary['counters'].items():
+                self.counters[name] = self.counters.get(name, 0) + value
+            self.peak_memory_bytes = max(self.peak_memory_bytes, summary['peak_memory_bytes'])
+
+    def summary(self) -> dict:
+        """Copia de las métricas acumuladas."""
+        with self._lock:
+            return {
+                'stages': {name: dict(stats) for name, stats in self.stages.items()},
+                'counters': dict(self.counters),
+                'peak_memory_bytes': self.peak_memory_bytes
+            }
+
+    def to_prometheus(self) -> str:
+        """Métricas en formato de texto de Prometheus."""
+        summary = self.summary()
+        lines = []
+        for field, help_text in (('wall_seconds', 'Tiempo de reloj por etapa'),
+                                 ('cpu_seconds', 'Tiempo de CPU por etapa'),
+                                 ('calls', 'Ejecuciones por etapa')):
+            metric = f"{METRIC_PREFIX}_stage_{field}_total"
+            lines.append(f"# HELP {metric} {help_text}")
+            lines.append(f"# TYPE {metric} counter")
+            for name, stats in summary['stages'].items():
+                lines.append(f'{metric}{{stage="{name}"}} {stats[field]}')
+        for name, value in summary['counters'].items():
+            metric = f"{METRIC_PREFIX}_{name}_total"
+            lines.append(f"# TYPE {metric} counter")
+            lines.append(f"{metric} {value}")
+        metric = f"{METRIC_PREFIX}_peak_memory_bytes"
+        lines.append(f"# TYPE {metric} gauge")
+        lines.append(f"{metric} {summary['peak_memory_bytes']}")
+        return '\n'.join(lines) + '\n'
+
+    def write_prometheus(self, path: str):
+        """Escribe las métricas en un archivo (p. ej. para el textfile collector de node_exporter)."""
+        tmp_path = f"{path}.tmp"
+        with open(tmp_path, 'w', encoding='utf-8') as file:
+            file.write(self.to_prometheus())
+        os.replace(tmp_path, path)
+
+    def serve_prometheus(self, port: int, host: str = '127.0.0.1') -> ThreadingHTTPServer:
+        """Expone las métricas en http://host:port/metrics desde un hilo en segundo plano."""
+        metrics = self
+
+        class MetricsHandler(BaseHTTPRequestHandler):
+            def do_GET(self):
+                body = metrics.to_prometheus().encode('utf-8')
+                self.send_response(200)
+                self.send_header('Content-Type', 'text/plain; version=0.0.4')
+                self.send_header('Content-Length', str(len(body)))
+                self.end_headers()
+                self.wfile.write(body)
+
+            def log_message(self, format, *args):
+                pass
+
+        server = ThreadingHTTPServer((host, port), MetricsHandler)
+        threading.Thread(target=server.serve_forever, daemon=True).start()
+        return server
+
+
+class NullMetrics:
+    """Métricas desactivadas: todas las operaciones son no-ops."""
+
+    enabled = False
+    _context = nullcontext()
+
+    def stage(self, name: str):
+        return self._context
+
+    def timed_iter(self, name: str, iterable):
+        return iterable
+
+    def count(self, name: str, value: int = 1):
+        pass
+
+    def merge(self, summary: dict):
+        pass
+
+
+# Instancia compartida para cuando no se piden métricas
+NULL_METRICS = NullMetrics()
@@ -1,10 +1,21 @@
 # recommendations_engine.py
+import sys
+import argparse
+import joblib
 import numpy as np
+from types import MappingProxyType
 from sklearn.preprocessing import MinMaxScaler
-from typing import Dict, List, Tuple
+from typing import Dict, List, Tuple, Union
 import pandas as pd
 from sklearn.neighbors import NearestNeighbors
 
+# Niveles de puntuación y límites entre ellos (bajo < 4 <= medio < 7 <= alto)
+LEVELS = ('low', 'medium', 'high')
+LEVEL_BINS = np.array([4, 7])
+
+# Grupos en los que se presentan las recomendaciones
+RECOMMENDATION_GROUPS = ('sensory', 'mindfulness', 'adhd', 'general')
+
 class EducationalRecommender:
     def __init__(self):
         # Categorías principales de evaluación
@@ -62,6 +73,21 @@ class EducationalRecommender:
         }
         
         self.scaler = MinMaxScaler()
+
+        # Índice de casos históricos similares (ver build_similarity_index)
+        self.neighbors = None
+        self._history_ids = None
+        self._history_outcomes = None
+        self._field_fill = None
+
+        # Tablas derivadas de la base de conocimiento (se construyen bajo demanda)
+        self._recommendation_strings = None
+        self._recommendation_positions = None
+        self._rule_table = None
+        self._combination_table = None
+
+        # Aumenta con cada cambio de la base de conocimiento (p. ej. para invalidar cachés)
+        self.version = 0
         
     def _calculate_category_scores(self, data: Dict) -> Dict[str, float]:
         """Calcula puntuaciones promedio por categoría."""
@@ -83,40 +109,111 @@ class EducationalRecommender:
                 concerns.append((category, 'high'))
         return concerns
     
+    def _rule_sources(self, category: str, level: str) -> Dict[str, List[str]]:
+        """Recomendaciones que aporta un área de preocupación según las reglas."""
+        recommendations = {group: [] for group in RECOMMENDATION_GROUPS}
+
+        # Recomendaciones de integración sensorial
+        if category in ['cognitive', 'attention']:
+            key = f'attention_{level}'
+            if key in self.knowledge_base['sensory_integration']:
+                recommendations['sensory'].extend(
+                    self.knowledge_base['sensory_integration'][key]
+                )
+
+        # Recomendaciones de mindfulness
+        if category in ['cognitive', 'social']:
+            if 'anxiety_high' in self.knowledge_base['mindfulness']:
+                recommendations['mindfulness'].extend(
+                    self.knowledge_base['mindfulness']['anxiety_high']
+                )
+
+        # Recomendaciones TDAH
+        if level == 'low':
+            key = f'{category}_low'
+            if key in self.knowledge_base['adhd_strategies']:
+                recommendations['adhd'].extend(
+                    self.knowledge_base['adhd_strategies'][key]
+                )
+
+        # Recomendaciones generales: de la categoría o de cualquiera con ese nivel
+        general = self.knowledge_base.get('general', {})
+        for key in (f'{category}_{level}', f'general_{level}'):
+            if key in general:
+                recommendations['general'].extend(general[key])
+
+        return recommendations
+
+    def _compile_rules(self):
+        """Compila la base de conocimiento en una tabla inmutable de reglas.
+
+        Todas las recomendaciones se guardan una sola vez (internadas) en
+        `_recommendation_strings`; la tabla asocia cada (categoría, nivel) a
+        tuplas de identificadores por grupo.
+        """
+        strings = []
+        positions = {}
+        for strategies in self.knowledge_base.values():
+            for texts in strategies.values():
+                for text in texts:
+                    if text not in positions:
+                        positions[text] = len(strings)
+                        strings.append(sys.intern(text))
+        self._recommendation_positions = positions
+        self._recommendation_strings = tuple(strings)
+
+        self._rule_table = MappingProxyType({
+            (category, level): self._compile_rule(category, level)
+            for category in self.categories
+            for level in LEVELS
+        })
+
+    def _compile_rule(self, category: str, level: str) -> Dict[str, Tuple[int, ...]]:
+        """Convierte las recomendaciones de un área de preocupación en identificadores."""
+        return MappingProxyType({
+            group: tuple(self._recommendation_positions[text] for text in texts)
+            for group, texts in self._rule_sources(category, level).items()
+        })
+
+    @property
+    def recommendation_strings(self) -> Tuple[str, ...]:
+        """Texto de cada recomendación, indexado por su identificador."""
+        if self._rule_table is None:
+            self._compile_rules()
+        return self._recommendation_strings
+
+    def prepare(self):
+        """Precalcula las tablas derivadas de la base de conocimiento.
+
+        Conviene llamarlo antes de atender peticiones; `serve.py` lo hace antes
+        de crear los procesos que comparten las tablas.
+        """
+        if self._rule_table is None:
+            self._compile_rules()
+        self._get_combination_table()
+
+    def _get_recommendation_ids(self, concerns: List[Tuple[str, str]]) -> Dict[str, Tuple[int, ...]]:
+        """Identificadores de las recomendaciones para las áreas de preocupación, sin repetir."""
+        if self._rule_table is None:
+            self._compile_rules()
+
+        recommendation_ids = {group: {} for group in RECOMMENDATION_GROUPS}
+        for category, level in concerns:
+            rule = self._rule_table.get((category, level))
+            if rule is None:
+                rule = self._compile_rule(category, level)
+            for group, ids in rule.items():
+                recommendation_ids[group].update(dict.fromkeys(ids))
+
+        return {group: tuple(ids) for group, ids in recommendation_ids.items()}
+
     def _get_recommendations(self, concerns: List[Tuple[str, str]]) -> Dict[str, List[str]]:
         """Genera recomendaciones basadas en áreas de preocupación."""
-        recommendations = {
-            'sensory': [],
-            'mindfulness': [],
-            'adhd': [],
-            'general': []
+        strings = self.recommendation_strings
+        return {
+            group: [strings[i] for i in ids]
+            for group, ids in self._get_recommendation_ids(concerns).items()
         }
-        
-        for category, level in concerns:
-            # Recomendaciones de integración sensorial
-            if category in ['cognitive', 'attention']:
-                key = f'attention_{level}'
-                if key in self.knowledge_base['sensory_integration']:
-                    recommendations['sensory'].extend(
-                        self.knowledge_base['sensory_integration'][key]
-                    )
-            
-            # Recomendaciones de mindfulness
-            if category in ['cognitive', 'social']:
-                if 'anxiety_high' in self.knowledge_base['mindfulness']:
-                    recommendations['mindfulness'].extend(
-                        self.knowledge_base['mindfulness']['anxiety_high']
-                    )
-            
-            # Recomendaciones TDAH
-            if level == 'low':
-                key = f'{category}_low'
-                if key in self.knowledge_base['adhd_strategies']:
-                    recommendations['adhd'].extend(
-                        self.knowledge_base['adhd_strategies'][key]
-                    )
-        
-        return recommendations
     
     def get_personalized_recommendations(self, data: Dict) -> Dict:
         """Procesa los datos y genera recomendaciones personalizadas."""
@@ -126,23 +223,277 @@ class EducationalRecommender:
         # Identificar áreas de preocupación
         concerns = self._identify_areas_of_concern(category_scores)
         
-        # Generar recomendaciones
-        recommendations = self._get_recommendations(concerns)
+        # Generar recomendaciones (identificadores y texto para mostrar)
+        recommendation_ids = self._get_recommendation_ids(concerns)
+        strings = self.recommendation_strings
+        recommendations = {
+            group: [strings[i] for i in ids]
+            for group, ids in recommendation_ids.items()
+        }
         
         # Agregar métricas y análisis
         analysis = {
             'scores': category_scores,
             'primary_concerns': [c[0] for c in concerns if c[1] == 'low'],
             'strengths': [c[0] for c in concerns if c[1] == 'high'],
-            'recommendations': recommendations
+            'recommendations': recommendations,
+            'recommendation_ids': recommendation_ids
         }
         
         return analysis
 
+    @property
+    def fields(self) -> List[str]:
+        """Campos de evaluación en el orden de las categorías."""
+        return [field for fields in self.categories.values() for field in fields]
+
+    def _category_matrix(self) -> np.ndarray:
+        """Matriz campo x categoría que indica a qué categoría pertenece cada campo."""
+        matrix = np.zeros((len(self.fields), len(self.categories)))
+        row = 0
+        for column, fields in enumerate(self.categories.values()):
+            matrix[row:row + len(fields), column] = 1
+            row += len(fields)
+        return matrix
+
+    def _get_combination_table(self) -> List[Dict[str, List[str]]]:
+        """Recomendaciones para cada combinación de niveles por categoría.
+
+        La combinación se codifica como sum(nivel_i * 3**i), con el nivel de
+        cada categoría en el orden de `self.categories`.
+        """
+        if self._combination_table is None:
+            self._combination_table = [
+                self._get_recommendations(self._combination_concerns(code))
+                for code in range(len(LEVELS) ** len(self.categories))
+            ]
+        return self._combination_table
+
+    def _combination_concerns(self, code: int) -> List[Tuple[str, str]]:
+        """Áreas de preocupación (categoría, nivel) que codifica una combinación."""
+        concerns = []
+        for category in self.categories:
+            code, level = divmod(code, len(LEVELS))
+            concerns.append((category, LEVELS[level]))
+        return concerns
+
+    def _field_matrix(self, data: Union[pd.DataFrame, np.ndarray]) -> Tuple[np.ndarray, pd.Index]:
+        """Matriz estudiantes x campos (NaN donde falta un campo) y su índice."""
+        if isinstance(data, pd.DataFrame):
+            return data.reindex(columns=self.fields).to_numpy(dtype=float), data.index
+        values = np.asarray(data, dtype=float)
+        return values, pd.RangeIndex(len(values))
+
+    def get_batch_recommendations(self, data: Union[pd.DataFrame, np.ndarray]) -> Dict:
+        """Calcula puntuaciones y recomendaciones para muchos estudiantes a la vez.
+
+        `data` es un DataFrame con una columna por campo de evaluación (las
+        columnas ausentes o los valores NaN se ignoran, como en el cálculo por
+        estudiante) o una matriz con los campos en el orden de `self.fields`.
+        Cada estudiante recibe un identificador de conjunto de recomendaciones
+        que indexa `recommendation_sets`.
+        """
+        values, index = self._field_matrix(data)
+
+        # Promedios por categoría con una sola reducción matricial
+        matrix = self._category_matrix()
+        present = ~np.isnan(values)
+        sums = np.where(present, values, 0) @ matrix
+        counts = present @ matrix
+        scores = np.divide(sums, counts, out=np.zeros_like(sums), where=counts > 0)
+
+        # Niveles por categoría y código de su combinación
+        levels = np.digitize(scores, LEVEL_BINS)
+        codes = levels @ (len(LEVELS) ** np.arange(len(self.categories)))
+
+        categories = list(self.categories)
+        return {
+            'scores': pd.DataFrame(scores, index=index, columns=categories),
+            'levels': pd.DataFrame(np.array(LEVELS)[levels], index=index, columns=categories),
+            'recommendation_ids': pd.Series(codes, index=index),
+            'recommendation_sets': self._get_combination_table()
+        }
+
+    @staticmethod
+    def _check_strategies(category: str, strategies) -> Dict[str, List[str]]:
+        """Comprueba que las recomendaciones de un grupo tengan la forma {clave: [textos]}."""
+        if not isinstance(strategies, dict):
+            raise TypeError(
+                f"Las recomendaciones de '{category}' deben ser un diccionario "
+                f"{{clave: [recomendaciones]}}, no {type(strategies).__name__}"
+            )
+        return strategies
+
     def update_knowledge_base(self, new_recommendations: Dict):
-        """Actualiza la base de conocimiento con nuevas recomendaciones."""
+        """Actualiza la base de conocimiento con nuevas recomendaciones.
+
+        Las listas de las claves indicadas reemplazan a las existentes; para
+        añadir sin reemplazar, ver `add_recommendations`.
+        """
+        new_texts = []
         for category, strategies in new_recommendations.items():
-            if category in self.knowledge_base:
-                self.knowledge_base[category].update(strategies)
-            else:
-                self.knowledge_base[category] = strategies
\ No newline at end of file
+            strategies = self._check_strategies(category, strategies)
+            self.knowledge_base.setdefault(category, {}).update(
+                {key: list(texts) for key, texts in strategies.items()}
+            )
+            for texts in strategies.values():
+                new_texts.extend(texts)
+        self._refresh_rules(new_texts)
+
+    def add_recommendations(self, new_recommendations: Dict) -> int:
+        """Añade recomendaciones {grupo: {clave: [textos]}} sin reemplazar las existentes.
+
+        Las recomendaciones ya presentes en la misma clave se ignoran. Solo se
+        recalculan las reglas y combinaciones afectadas. Devuelve cuántas
+        recomendaciones se añadieron.
+        """
+        new_texts = []
+        for category, strategies in new_recommendations.items():
+            strategies = self._check_strategies(category, strategies)
+            group = self.knowledge_base.setdefault(category, {})
+            for key, texts in strategies.items():
+                current = group.setdefault(key, [])
+                existing = set(current)
+                for text in texts:
+                    if text not in existing:
+                        existing.add(text)
+                        current.append(text)
+                        new_texts.append(text)
+        if new_texts:
+            self._refresh_rules(new_texts)
+        return len(new_texts)
+
+    def _refresh_rules(self, new_texts: List[str]):
+        """Actualiza las tablas precalculadas tras un cambio en la base de conocimiento.
+
+        Los textos nuevos se añaden al final de `_recommendation_strings`, así
+        que los identificadores existentes no cambian. Se recompilan las
+        reglas y solo se recalculan las combinaciones que usan alguna regla
+        modificada; las tablas nuevas sustituyen a las anteriores de una vez.
+        """
+        self.version += 1
+        if self._rule_table is None:
+            return
+
+        positions = dict(self._recommendation_positions)
+        strings = list(self._recommendation_strings)
+        for text in new_texts:
+            if text not in positions:
+                positions[text] = len(strings)
+                strings.append(sys.intern(text))
+        self._recommendation_positions = positions
+        self._recommendation_strings = tuple(strings)
+
+        rules = {}
+        changed = set()
+        for concern, rule in self._rule_table.items():
+            rules[concern] = self._compile_rule(*concern)
+            if rules[concern] != rule:
+                changed.add(concern)
+        if not changed:
+            return
+        self._rule_table = MappingProxyType(rules)
+
+        if self._combination_table is not None:
+            table = list(self._combination_table)
+            for code in range(len(table)):
+                concerns = self._combination_concerns(code)
+                if changed.intersection(concerns):
+                    table[code] = self._get_recommendations(concerns)
+            self._combination_table = table
+
+    def build_similarity_index(self, history: Union[pd.DataFrame, np.ndarray], outcomes: List = None,
+                               algorithm: str = 'ball_tree', leaf_size: int = 40):
+        """Indexa evaluaciones históricas para buscar estudiantes similares.
+
+        `history` tiene los campos de `self.fields`; `outcomes` guarda, para
+        cada caso, las recomendaciones que funcionaron. Los campos ausentes se
+        completan con la media histórica y todo se escala con `self.scaler`.
+        `algorithm` admite los valores de NearestNeighbors ('ball_tree',
+        'kd_tree', 'brute' o 'auto').
+        """
+        values, index = self._field_matrix(history)
+        self._field_fill = np.nan_to_num(np.nanmean(values, axis=0), nan=0.0)
+        values = np.where(np.isnan(values), self._field_fill, values)
+
+        scaled = self.scaler.fit_transform(values)
+        self.neighbors = NearestNeighbors(algorithm=algorithm, leaf_size=leaf_size).fit(scaled)
+        self._history_ids = np.asarray(index)
+        self._history_outcomes = list(outcomes) if outcomes is not None else [[] for _ in index]
+
+    def save_similarity_index(self, path: str):
+        """Guarda el índice de estudiantes similares en disco."""
+        joblib.dump({
+            'scaler': self.scaler,
+            'neighbors': self.neighbors,
+            'ids': self._history_ids,
+            'outcomes': self._history_outcomes,
+            'fill': self._field_fill
+        }, path)
+
+    def load_similarity_index(self, path: str, mmap: bool = True):
+        """Carga un índice guardado; con `mmap=True` sus arrays se mapean en memoria."""
+        state = joblib.load(path, mmap_mode='r' if mmap else None)
+        self.scaler = state['scaler']
+        self.neighbors = state['neighbors']
+        self._history_ids = state['ids']
+        self._history_outcomes = state['outcomes']
+        self._field_fill = state['fill']
+
+    def find_similar_students(self, data: Dict, k: int = 5) -> List[Dict]:
+        """Devuelve los `k` casos históricos más parecidos y sus recomendaciones."""
+        if self.neighbors is None:
+            raise ValueError("El índice de estudiantes similares no está construido")
+
+        values = np.array([[data.get(field, np.nan) for field in self.fields]], dtype=float)
+        values = np.where(np.isnan(values), self._field_fill, values)
+        distances, indices = self.neighbors.kneighbors(
+            self.scaler.transform(values), n_neighbors=min(k, len(self._history_ids))
+        )
+
+        # tolist() devuelve tipos nativos de Python tanto para ids numéricos como de texto
+        ids = self._history_ids[indices[0]].tolist()
+        return [
+            {
+                'id': item_id,
+                'distance': float(distance),
+                'recommendations': self._history_outcomes[i]
+            }
+            for item_id, distance, i in zip(ids, distances[0], indices[0])
+        ]
+
+
+def main():
+    """Construye fuera de línea el índice de estudiantes similares."""
+    parser = argparse.ArgumentParser(
+        description="Construye el índice de estudiantes similares a partir de un CSV histórico"
+    )
+    parser.add_argument('history', help="CSV con una fila por evaluación y una columna por campo")
+    parser.add_argument('output', help="Archivo donde guardar el índice")
+    parser.add_argument('--id-column', default=None, help="Columna con el identificador del caso")
+    parser.add_argument('--outcomes-column', default=None,
+                        help="Columna con las recomendaciones que funcionaron, separadas por ';'")
+    parser.add_argument('--algorithm', default='ball_tree',
+                        choices=['ball_tree', 'kd_tree', 'brute', 'auto'])
+    parser.add_argument('--leaf-size', type=int, default=40)
+    args = parser.parse_args()
+
+    history = pd.read_csv(args.history)
+    if args.id_column:
+        history = history.set_index(args.id_column)
+
+    outcomes = None
+    if args.outcomes_column:
+        outcomes = [
+            [rec.strip() for rec in str(value).split(';') if rec.strip()] if pd.notna(value) else []
+            for value in history[args.outcomes_column]
+        ]
+
+    recommender = EducationalRecommender()
+    recommender.build_similarity_index(history, outcomes, algorithm=args.algorithm,
+                                       leaf_size=args.leaf_size)
+    recommender.save_similarity_index(args.output)
+
+
+if __name__ == "__main__":
+    main()
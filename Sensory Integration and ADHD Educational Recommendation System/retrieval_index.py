@@ -0,0 +1,180 @@
+# retrieval_index.py
+import os
+import re
+import json
+import numpy as np
+from scipy import sparse
+
+# Mismo patrón de tokens que TfidfVectorizer por defecto
+TOKEN_PATTERN = re.compile(r'(?u)\b\w\w+\b')
+
+
+class RecommendationIndex:
+    """Índice TF-IDF incremental para buscar recomendaciones similares.
+
+    Guarda el vocabulario, las frecuencias de documento y una matriz dispersa
+    de conteos (una fila por recomendación). Las filas nuevas se acumulan y se
+    incorporan a la matriz en la siguiente consulta; los pesos IDF se calculan
+    igual que `TfidfVectorizer` (idf suavizado y normalización L2).
+    """
+
+    def __init__(self):
+        self.vocabulary = {}
+        self.doc_freq = np.zeros(0, dtype=np.int64)
+        self.ids = np.zeros(0, dtype=np.int64)
+        self.matrix = sparse.csc_matrix((0, 0), dtype=np.float32)
+        self._pending_rows = []
+        self._pending_ids = []
+        self._norms = None
+        # Ruta desde la que se cargó o en la que se guardó sin cambios posteriores
+        self._saved_path = None
+
+    def __len__(self) -> int:
+        return self.matrix.shape[0] + len(self._pending_ids)
+
+    @property
+    def indexed_ids(self) -> np.ndarray:
+        """Identificadores indexados, incluidos los pendientes de incorporar."""
+        return np.concatenate([self.ids, np.array(self._pending_ids, dtype=np.int64)])
+
+    def _term_counts(self, text: str, grow: bool) -> dict:
+        """Cuenta los términos de un texto (columna -> frecuencia)."""
+        counts = {}
+        for token in TOKEN_PATTERN.findall(text.lower()):
+            column = self.vocabulary.get(token)
+            if column is None:
+                if not grow:
+                    continue
+                column = self.vocabulary[token] = len(self.vocabulary)
+            counts[column] = counts.get(column, 0) + 1
+        return counts
+
+    def add(self, ids, texts):
+        """Añade recomendaciones al índice con sus identificadores externos."""
+        for item_id, text in zip(ids, texts):
+            self._pending_rows.append(self._term_counts(text, grow=True))
+            self._pending_ids.append(int(item_id))
+        self._norms = None
+        self._saved_path = None
+
+    def _consolidate(self):
+        """Incorpora las filas pendientes a la matriz de conteos."""
+        if not self._pending_rows:
+            return
+
+        n_terms = len(self.vocabulary)
+        indptr = [0]
+        indices = []
+        data = []
+        for counts in self._pending_rows:
+            indices.extend(counts.keys())
+            data.extend(counts.values())
+            indptr.append(len(indices))
+        block = sparse.csr_matrix(
+            (np.array(data, dtype=np.float32), np.array(indices, dtype=np.int32),
+             np.array(indptr, dtype=np.int64)),
+            shape=(len(self._pending_rows), n_terms)
+        )
+
+        # Ampliar la matriz existente con las columnas de términos nuevos
+        matrix = self.matrix
+        if matrix.shape[1] < n_terms:
+            indptr = np.concatenate([
+                matrix.indptr,
+                np.full(n_terms - matrix.shape[1], matrix.indptr[-1], dtype=matrix.indptr.dtype)
+            ])
+            matrix = sparse.csc_matrix((matrix.data, matrix.indices, indptr),
+                                       shape=(matrix.shape[0], n_terms))
+
+        self.matrix = sparse.vstack([matrix, block], format='csc')
+        doc_freq = np.zeros(n_terms, dtype=np.int64)
+        doc_freq[:len(self.doc_freq)] = self.doc_freq
+        self.doc_freq = doc_freq + np.bincount(block.indices, minlength=n_terms)
+        self.ids = np.concatenate([self.ids, np.array(self._pending_ids, dtype=np.int64)])
+        self._pending_rows = []
+        self._pending_ids = []
+
+    def _idf(self) -> np.ndarray:
+        """Pesos IDF suavizados, como en TfidfVectorizer."""
+        n_docs = self.matrix.shape[0]
+        return np.log((1 + n_docs) / (1 + self.doc_freq)) + 1
+
+    def query(self, text: str, top_n: int = 5) -> list:
+        """Devuelve los identificadores de las `top_n` recomendaciones más similares."""
+        self._consolidate()
+        n_docs = self.matrix.shape[0]
+        if n_docs == 0 or top_n <= 0:
+            return []
+
+        idf = self._idf()
+        if self._norms is None:
+            # Norma L2 de cada fila TF-IDF; solo se recalcula tras añadir filas
+            norms = np.sqrt(self.matrix.power(2) @ (idf ** 2))
+            norms[norms == 0] = 1
+            self._norms = norms
+
+        counts = self._term_counts(text, grow=False)
+        if counts:
+            columns = np.fromiter(counts.keys(), dtype=np.int64)
+            # La matriz guarda conteos: el IDF se aplica a la fila y a la consulta
+            weights = np.fromiter(counts.values(), dtype=np.float64) * idf[columns] ** 2
+            scores = (self.matrix[:, columns] @ weights) / self._norms
+        else:
+            scores = np.zeros(n_docs)
+
+        # Selección parcial de los k mejores y orden solo entre ellos
+        k = min(top_n, n_docs)
+        top = np.argpartition(-scores, k - 1)[:k]
+        top = top[np.argsort(-scores[top], kind='stable')]
+        return self.ids[top].tolist()
+
+    def save(self, path: str):
+        """Guarda el índice en un directorio (arrays .npy y vocabulario JSON).
+
+        Cada archivo se escribe aparte y luego sustituye al anterior, de modo
+        que los arrays mapeados desde ese mismo directorio (ver `load`) siguen
+        siendo válidos. Si el índice no cambió desde que se cargó o guardó en
+        `path`, no se escribe nada.
+        """
+        self._consolidate()
+        if self._saved_path == os.path.abspath(path):
+            return
+        os.makedirs(path, exist_ok=True)
+        arrays = {
+            'data.npy': self.matrix.data,
+            'indices.npy': self.matrix.indices,
+            'indptr.npy': self.matrix.indptr,
+            'doc_freq.npy': self.doc_freq,
+            'ids.npy': self.ids
+        }
+        for name, values in arrays.items():
+            tmp_path = os.path.join(path, f"{name}.tmp")
+            with open(tmp_path, 'wb') as file:
+                np.save(file, values)
+            os.replace(tmp_path, os.path.join(path, name))
+        # El vocabulario se escribe el último: confirma el resto de archivos
+        tmp_path = os.path.join(path, 'vocabulary.json.tmp')
+        with open(tmp_path, 'w', encoding='utf-8') as file:
+            json.dump({'shape': list(self.matrix.shape), 'vocabulary': self.vocabulary},
+                      file, ensure_ascii=False)
+        os.replace(tmp_path, os.path.join(path, 'vocabulary.json'))
+        self._saved_path = os.path.abspath(path)
+
+    @classmethod
+    def load(cls, path: str, mmap: bool = True) -> 'RecommendationIndex':
+        """Carga un índice guardado; con `mmap=True` los arrays se mapean en memoria."""
+        mmap_mode = 'r' if mmap else None
+        index = cls()
+        with open(os.path.join(path, 'vocabulary.json'), 'r', encoding='utf-8') as file:
+            meta = json.load(file)
+        index.vocabulary = meta['vocabulary']
+        index.matrix = sparse.csc_matrix(
+            (np.load(os.path.join(path, 'data.npy'), mmap_mode=mmap_mode),
+             np.load(os.path.join(path, 'indices.npy'), mmap_mode=mmap_mode),
+             np.load(os.path.join(path, 'indptr.npy'), mmap_mode=mmap_mode)),
+            shape=tuple(meta['shape']), copy=False
+        )
+        index.doc_freq = np.load(os.path.join(path, 'doc_freq.npy'))
+        index.ids = np.load(os.path.join(path, 'ids.npy'), mmap_mode=mmap_mode)
+        index._saved_path = os.path.abspath(path)
+        return index
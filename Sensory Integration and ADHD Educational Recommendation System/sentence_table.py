@@ -0,0 +1,286 @@
+# sentence_table.py
+import os
+import json
+import hashlib
+import threading
+import numpy as np
+from knowledge_store import KNOWLEDGE_KINDS
+
+# Columnas de la tabla y su tipo; el texto se guarda aparte como bytes UTF-8
+COLUMNS = {
+    'offsets': np.int64,   # Fin (exclusivo) de cada oración dentro del texto
+    'kind': np.uint8,      # Máscara de bits de tipos de conocimiento
+    'category': np.uint32, # Máscara de bits de categorías
+    'source': np.int32,    # Identificador del documento de origen
+    'page': np.int32       # Página (desde 1; 0 si el documento no tiene páginas)
+}
+
+META_FILE = 'meta.json'
+TEXT_FILE = 'text.bin'
+# Nombres de los documentos de origen, uno por línea en JSON
+SOURCES_FILE = 'sources.jsonl'
+# Huellas de los documentos ya añadidos, de tamaño fijo
+DOCUMENTS_FILE = 'documents.bin'
+DOCUMENT_DIGEST_SIZE = 16
+
+
+class SentenceTable:
+    """Tabla columnar de oraciones extraídas y su procedencia.
+
+    El texto de todas las oraciones se concatena en un único bloque de bytes
+    UTF-8 con una columna de desplazamientos, y los tipos de conocimiento,
+    categorías, documento de origen y página se guardan como columnas de
+    enteros (los tipos y categorías, como máscaras de bits). Cada documento se
+    añade en un solo lote.
+
+    Con `path`, cada columna es un archivo binario en ese directorio al que
+    solo se añaden datos, y la lectura usa `np.memmap`: se pueden filtrar y
+    recorrer millones de oraciones sin cargarlas como objetos de Python. Los
+    nombres de documento y las huellas de los documentos añadidos también se
+    guardan en archivos a los que solo se añade, y `meta.json` solo contiene
+    los contadores que confirman cada lote, así que añadir un documento
+    cuesta lo mismo con cualquier tamaño de la tabla. Sin `path`, la tabla
+    vive en memoria.
+    """
+
+    def __init__(self, path: str = None, kinds: tuple = KNOWLEDGE_KINDS):
+        self.path = path
+        self.kinds = list(kinds)
+        self.categories = []
+        self.sources = []
+        self._source_ids = {}
+        # Huellas (origen y contenido extraído) de los documentos ya añadidos
+        self._documents = set()
+        self._rows = 0
+        self._text_size = 0
+        self._sources_size = 0
+        # Tabla en memoria: lotes de cada columna pendientes de unir
+        self._parts = {name: [] for name in ('text', *COLUMNS)}
+        self._columns = {}
+        self._lock = threading.RLock()
+
+        if path is not None:
+            os.makedirs(path, exist_ok=True)
+            if os.path.exists(os.path.join(path, META_FILE)):
+                self._load_meta()
+
+    def __len__(self) -> int:
+        return self._rows
+
+    def _file(self, name: str) -> str:
+        files = {'text': TEXT_FILE, 'sources': SOURCES_FILE, 'documents': DOCUMENTS_FILE}
+        return os.path.join(self.path, files.get(name, f"{name}.bin"))
+
+    def _load_meta(self):
+        """Lee los metadatos y descarta lo escrito por un lote que no llegó a completarse."""
+        with open(os.path.join(self.path, META_FILE), 'r', encoding='utf-8') as file:
+            meta = json.load(file)
+        self._rows = meta['rows']
+        self._text_size = meta['text_size']
+        self.kinds = meta['kinds'] + [kind for kind in self.kinds if kind not in meta['kinds']]
+        self.categories = meta['categories']
+        self._sources_size = meta['sources_size']
+
+        sizes = {name: self._rows * np.dtype(dtype).itemsize for name, dtype in COLUMNS.items()}
+        sizes['text'] = self._text_size
+        sizes['sources'] = self._sources_size
+        sizes['documents'] = meta['documents'] * DOCUMENT_DIGEST_SIZE
+        for name, size in sizes.items():
+            file_path = self._file(name)
+            actual = os.path.getsize(file_path) if os.path.exists(file_path) else 0
+            if actual < size:
+                raise ValueError(f"Tabla de oraciones incompleta: {file_path}")
+            if actual > size:
+                os.truncate(file_path, size)
+
+        self.sources = [json.loads(line) for line in self._read('sources').splitlines()]
+        self._source_ids = {name: i for i, name in enumerate(self.sources)}
+        data = self._read('documents')
+        self._documents = {data[i:i + DOCUMENT_DIGEST_SIZE]
+                           for i in range(0, len(data), DOCUMENT_DIGEST_SIZE)}
+
+    def _read(self, name: str) -> bytes:
+        file_path = self._file(name)
+        if not os.path.exists(file_path):
+            return b''
+        with open(file_path, 'rb') as file:
+            return file.read()
+
+    def _write_meta(self):
+        meta = {
+            'rows': self._rows,
+            'text_size': self._text_size,
+            'kinds': self.kinds,
+            'categories': self.categories,
+            'sources_size': self._sources_size,
+            'documents': len(self._documents)
+        }
+        meta_path = os.path.join(self.path, META_FILE)
+        with open(f"{meta_path}.tmp", 'w', encoding='utf-8') as file:
+            json.dump(meta, file, ensure_ascii=False)
+        os.replace(f"{meta_path}.tmp", meta_path)
+
+    def _bit(self, names: list, name: str, limit: int) -> int:
+        """Bit asignado a un tipo o categoría (los nuevos se añaden al final)."""
+        if name not in names:
+            if len(names) >= limit:
+                raise ValueError(f"Demasiados valores distintos para una máscara de {limit} bits")
+            names.append(name)
+        return 1 << names.index(name)
+
+    def source_id(self, source: str) -> int:
+        """Identificador de un documento de origen (se asigna al verlo por primera vez)."""
+        source_id = self._source_ids.get(source)
+        if source_id is None:
+            if self.path is not None:
+                # Lo confirman los metadatos del siguiente lote
+                line = (json.dumps(source, ensure_ascii=False) + '\n').encode('utf-8')
+                with open(self._file('sources'), 'ab') as file:
+                    file.write(line)
+                self._sources_size += len(line)
+            source_id = self._source_ids[source] = len(self.sources)
+            self.sources.append(source)
+        return source_id
+
+    def append(self, texts: list, kinds: list, categories: list, source: str = None,
+               pages: list = None):
+        """Añade un lote de oraciones con sus máscaras de tipo y categoría."""
+        self._append(texts, kinds, categories, source, pages)
+
+    def _append(self, texts: list, kinds: list, categories: list, source: str,
+                pages: list, document: bytes = None):
+        """Añade un lote y, si se indica, la huella de su documento en la misma confirmación."""
+        if not texts:
+            return
+        encoded = [text.encode('utf-8') for text in texts]
+        with self._lock:
+            offsets = self._text_size + np.cumsum(
+                np.fromiter(map(len, encoded), dtype=np.int64, count=len(encoded))
+            )
+            batch = {
+                'text': np.frombuffer(b''.join(encoded), dtype=np.uint8),
+                'offsets': offsets,
+                'kind': np.asarray(kinds, dtype=COLUMNS['kind']),
+                'category': np.asarray(categories, dtype=COLUMNS['category']),
+                'source': np.full(len(texts), self.source_id(source), dtype=COLUMNS['source']),
+                'page': np.asarray(pages if pages is not None else np.zeros(len(texts)),
+                                   dtype=COLUMNS['page'])
+            }
+
+            if self.path is not None:
+                # Añadir al final de cada archivo; los metadatos confirman el lote
+                for name, values in batch.items():
+                    with open(self._file(name), 'ab') as file:
+                        values.tofile(file)
+                if document is not None:
+                    with open(self._file('documents'), 'ab') as file:
+                        file.write(document)
+            else:
+                for name, values in batch.items():
+                    self._parts[name].append(values)
+            if document is not None:
+                self._documents.add(document)
+            self._rows += len(texts)
+            self._text_size = int(offsets[-1])
+            if self.path is not None:
+                self._write_meta()
+            self._columns = {}
+
+    def append_knowledge(self, extracted_knowledge: dict, source: str = None) -> bool:
+        """Añade las oraciones extraídas de un documento (ver `DocumentProcessor`).
+
+        Cada oración distinta del documento ocupa una fila con todos sus
+        tipos y categorías; la página sale de `extracted_knowledge['pages']`.
+        Un documento ya añadido con el mismo origen y el mismo contenido
+        extraído (p. ej. subido de nuevo) se ignora. Devuelve si se añadió.
+        """
+        with self._lock:
+            masks = {}
+            for kind in self.kinds:
+                bit = self._bit(self.kinds, kind, 8)
+                for sentence in extracted_knowledge.get(kind, []):
+                    masks.setdefault(sentence, [0, 0])[0] |= bit
+            for category, sentences in extracted_knowledge.get('categorized_content', {}).items():
+                bit = self._bit(self.categories, category, 32)
+                for sentence in sentences:
+                    masks.setdefault(sentence, [0, 0])[1] |= bit
+
+            pages = extracted_knowledge.get('pages', {})
+            texts = list(masks)
+            rows = [[text, *masks[text], pages.get(text, 0)] for text in texts]
+            document = hashlib.blake2b(
+                json.dumps([source, rows], ensure_ascii=False).encode('utf-8'),
+                digest_size=DOCUMENT_DIGEST_SIZE
+            ).digest()
+            if not texts or document in self._documents:
+                return False
+
+            self._append(texts, [masks[text][0] for text in texts],
+                         [masks[text][1] for text in texts], source,
+                         [pages.get(text, 0) for text in texts], document)
+            return True
+
+    def column(self, name: str) -> np.ndarray:
+        """Columna completa (`text`, `offsets`, `kind`, `category`, `source` o `page`).
+
+        En una tabla guardada en disco es un array mapeado en memoria de solo lectura.
+        """
+        with self._lock:
+            if name not in self._columns:
+                dtype = np.uint8 if name == 'text' else COLUMNS[name]
+                size = self._text_size if name == 'text' else self._rows
+                if size == 0:
+                    values = np.zeros(0, dtype=dtype)
+                elif self.path is not None:
+                    values = np.memmap(self._file(name), dtype=dtype, mode='r', shape=(size,))
+                else:
+                    # Unir los lotes pendientes una sola vez
+                    values = np.concatenate(self._parts[name])
+                    self._parts[name] = [values]
+                self._columns[name] = values
+            return self._columns[name]
+
+    def text(self, row: int) -> str:
+        """Texto de una fila."""
+        offsets = self.column('offsets')
+        start = int(offsets[row - 1]) if row > 0 else 0
+        return bytes(self.column('text')[start:offsets[row]]).decode('utf-8')
+
+    def texts(self, rows=None):
+        """Genera el texto de las filas indicadas (todas por defecto), decodificando solo esas."""
+        if rows is None:
+            rows = range(self._rows)
+        for row in rows:
+            yield self.text(int(row))
+
+    def select(self, kind: str = None, category: str = None, source: str = None,
+               page: int = None) -> np.ndarray:
+        """Índices de las filas que cumplen todos los filtros indicados."""
+        mask = np.ones(self._rows, dtype=bool)
+        if kind is not None:
+            if kind not in self.kinds:
+                return np.zeros(0, dtype=np.int64)
+            mask &= (self.column('kind') & (1 << self.kinds.index(kind))) != 0
+        if category is not None:
+            if category not in self.categories:
+                return np.zeros(0, dtype=np.int64)
+            mask &= (self.column('category') & (1 << self.categories.index(category))) != 0
+        if source is not None:
+            if source not in self._source_ids:
+                return np.zeros(0, dtype=np.int64)
+            mask &= self.column('source') == self._source_ids[source]
+        if page is not None:
+            mask &= self.column('page') == page
+        return np.flatnonzero(mask)
+
+    def provenance(self, row: int) -> dict:
+        """Documento, página, tipos y categorías de una fila."""
+        kind = int(self.column('kind')[row])
+        category = int(self.column('category')[row])
+        return {
+            'text': self.text(row),
+            'source': self.sources[self.column('source')[row]],
+            'page': int(self.column('page')[row]),
+            'kinds': [name for i, name in enumerate(self.kinds) if kind & (1 << i)],
+            'categories': [name for i, name in enumerate(self.categories) if category & (1 << i)]
+        }
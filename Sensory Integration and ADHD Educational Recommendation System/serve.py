@@ -0,0 +1,233 @@
+# serve.py
+import gc
+import os
+import json
+import mmap
+import time
+import signal
+import socket
+import argparse
+import numpy as np
+import pandas as pd
+from http.server import BaseHTTPRequestHandler, HTTPServer
+from recommendations_engine import EducationalRecommender
+
+# Latencias recientes que guarda cada proceso para calcular percentiles
+LATENCY_WINDOW = 10_000
+
+# Tamaño máximo aceptado del cuerpo de una petición
+MAX_BODY_BYTES = 64 * 1024 * 1024
+
+
+class LatencyStats:
+    """Latencias de todos los procesos del servidor en memoria compartida.
+
+    Se crea antes de bifurcar: cada proceso escribe solo en su fila (un búfer
+    circular con las últimas `window` latencias) y cualquiera puede leerlas
+    todas para calcular los percentiles del servidor completo.
+    """
+
+    def __init__(self, workers: int, window: int = LATENCY_WINDOW):
+        self.window = window
+        self.worker = 0
+        # Memoria anónima compartida con los procesos hijos
+        self._buffer = mmap.mmap(-1, workers * (window + 1) * 8)
+        shared = np.frombuffer(self._buffer, dtype=np.float64).reshape(workers, window + 1)
+        self.counts = shared[:, 0]
+        self.samples = shared[:, 1:]
+
+    def record(self, seconds: float):
+        """Registra la latencia de una petición atendida por este proceso."""
+        count = int(self.counts[self.worker])
+        self.samples[self.worker, count % self.window] = seconds
+        self.counts[self.worker] = count + 1
+
+    def summary(self) -> dict:
+        """Peticiones por proceso y percentiles de latencia (ms) de las recientes."""
+        filled = np.minimum(self.counts, self.window).astype(int)
+        samples = np.concatenate([self.samples[worker, :n] for worker, n in enumerate(filled)])
+        summary = {
+            'requests': int(self.counts.sum()),
+            'requests_per_worker': self.counts.astype(int).tolist()
+        }
+        if len(samples):
+            summary.update({
+                'mean_ms': float(samples.mean() * 1000),
+                'p50_ms': float(np.percentile(samples, 50) * 1000),
+                'p99_ms': float(np.percentile(samples, 99) * 1000)
+            })
+        return summary
+
+
+def parse_students(payload) -> list:
+    """Evaluaciones de una petición: un objeto, una lista o {"students": [...]}."""
+    if isinstance(payload, dict):
+        payload = payload['students'] if 'students' in payload else [payload]
+    if not isinstance(payload, list) or not all(isinstance(item, dict) for item in payload):
+        raise ValueError("Se espera un objeto, una lista de objetos o {\"students\": [...]}")
+    return payload
+
+
+def recommend(recommender: EducationalRecommender, students: list) -> dict:
+    """Recomendaciones para un lote de evaluaciones con `get_batch_recommendations`.
+
+    Cada resultado indica su conjunto de recomendaciones; el texto de cada
+    conjunto usado se incluye una sola vez en `recommendation_sets`.
+    """
+    if not students:
+        return {'results': [], 'recommendation_sets': {}}
+
+    batch = recommender.get_batch_recommendations(pd.DataFrame.from_records(students))
+    categories = list(batch['scores'].columns)
+    codes = batch['recommendation_ids'].to_numpy()
+    results = [
+        {
+            'scores': dict(zip(categories, scores)),
+            'primary_concerns': [c for c, level in zip(categories, levels) if level == 'low'],
+            'strengths': [c for c, level in zip(categories, levels) if level == 'high'],
+            'recommendation_set': int(code)
+        }
+        for scores, levels, code in zip(batch['scores'].to_numpy().tolist(),
+                                        batch['levels'].to_numpy(), codes)
+    ]
+    sets = batch['recommendation_sets']
+    return {
+        'results': results,
+        'recommendation_sets': {str(code): sets[code] for code in np.unique(codes).tolist()}
+    }
+
+
+def make_handler(recommender: EducationalRecommender, stats: LatencyStats):
+    """Manejador HTTP que atiende las peticiones con el recomendador ya cargado."""
+
+    class RecommendationHandler(BaseHTTPRequestHandler):
+        def _send_json(self, status: int, body: dict):
+            data = json.dumps(body, ensure_ascii=False).encode('utf-8')
+            self.send_response(status)
+            self.send_header('Content-Type', 'application/json; charset=utf-8')
+            self.send_header('Content-Length', str(len(data)))
+            self.end_headers()
+            self.wfile.write(data)
+
+        def do_GET(self):
+            if self.path == '/health':
+                self._send_json(200, {'status': 'ok', 'pid': os.getpid(),
+                                      'fields': recommender.fields})
+            elif self.path == '/stats':
+                self._send_json(200, stats.summary())
+            else:
+                self._send_json(404, {'error': 'Ruta no encontrada'})
+
+        def do_POST(self):
+            if self.path != '/recommendations':
+                self._send_json(404, {'error': 'Ruta no encontrada'})
+                return
+
+            start = time.perf_counter()
+            length = int(self.headers.get('Content-Length') or 0)
+            if length > MAX_BODY_BYTES:
+                self._send_json(413, {'error': 'Petición demasiado grande'})
+                return
+            try:
+                students = parse_students(json.loads(self.rfile.read(length)))
+                body = recommend(recommender, students)
+            except (ValueError, KeyError, TypeError) as error:
+                self._send_json(400, {'error': str(error)})
+                return
+            self._send_json(200, body)
+            stats.record(time.perf_counter() - start)
+
+        def log_message(self, format, *args):
+            pass
+
+    return RecommendationHandler
+
+
+def run_worker(sock: socket.socket, recommender: EducationalRecommender, stats: LatencyStats):
+    """Atiende peticiones sobre el socket compartido hasta que se detenga el proceso."""
+    server = HTTPServer(sock.getsockname()[:2], make_handler(recommender, stats),
+                        bind_and_activate=False)
+    server.socket.close()
+    server.socket = sock
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+
+
+def serve(host: str = '127.0.0.1', port: int = 8000, workers: int = None):
+    """Carga el recomendador una vez y lo sirve desde varios procesos.
+
+    Los procesos se crean con `fork` después de cargar el modelo y compilar
+    las tablas de reglas, así que las comparten por copia en escritura;
+    `gc.freeze` evita que el recolector de basura toque (y copie) esos
+    objetos. En sistemas sin `fork` se usa un único proceso.
+    """
+    recommender = EducationalRecommender()
+    recommender.prepare()
+
+    if workers is None:
+        workers = os.cpu_count() or 1
+    if not hasattr(os, 'fork'):
+        workers = 1
+
+    stats = LatencyStats(workers)
+    sock = socket.create_server((host, port), backlog=1024)
+    gc.freeze()
+    print(f"Sirviendo recomendaciones en http://{host}:{port} con {workers} procesos")
+
+    if workers == 1:
+        run_worker(sock, recommender, stats)
+        return
+
+    children = {}
+    stopping = False
+
+    def start_worker(worker: int):
+        pid = os.fork()
+        if pid == 0:
+            signal.signal(signal.SIGTERM, signal.SIG_DFL)
+            signal.signal(signal.SIGINT, signal.default_int_handler)
+            stats.worker = worker
+            run_worker(sock, recommender, stats)
+            os._exit(0)
+        children[pid] = worker
+
+    def stop(signum, frame):
+        nonlocal stopping
+        stopping = True
+        for pid in children:
+            try:
+                os.kill(pid, signal.SIGTERM)
+            except ProcessLookupError:
+                pass
+
+    signal.signal(signal.SIGTERM, stop)
+    signal.signal(signal.SIGINT, stop)
+    for worker in range(workers):
+        start_worker(worker)
+
+    # Reponer los procesos que terminen inesperadamente
+    while children:
+        pid, _ = os.wait()
+        worker = children.pop(pid, None)
+        if worker is not None and not stopping:
+            start_worker(worker)
+    sock.close()
+
+
+def main():
+    """Punto de entrada del servidor HTTP de recomendaciones."""
+    parser = argparse.ArgumentParser(
+        description="Servidor HTTP multiproceso de recomendaciones personalizadas"
+    )
+    parser.add_argument('--host', default='127.0.0.1')
+    parser.add_argument('--port', type=int, default=8000)
+    parser.add_argument('--workers', type=int, default=None,
+                        help="Número de procesos (por defecto, todos los núcleos)")
+    args = parser.parse_args()
+    serve(args.host, args.port, args.workers)
+
+
+if __name__ == "__main__":
+    main()
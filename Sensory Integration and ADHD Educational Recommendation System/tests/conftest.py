@@ -0,0 +1,6 @@
+# conftest.py
+import os
+import sys
+
+# Los módulos de la aplicación están en el directorio superior
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
@@ -0,0 +1,49 @@
+# test_knowledge_store.py
+import sqlite3
+from knowledge_store import KnowledgeStore
+
+VARIANTS = ["Se recomienda usar temporizadores visuales",
+            "se recomienda  usar temporizadores VISUALES"]
+
+
+def test_reopen_with_normalize_merges_duplicates(tmp_path):
+    db_path = str(tmp_path / 'knowledge.db')
+    store = KnowledgeStore(db_path)
+    store.update_knowledge_base({
+        'recommendations': VARIANTS,
+        'categorized_content': {'adhd': VARIANTS[:1], 'sensory_integration': VARIANTS[1:]}
+    }, source='a.txt')
+    assert store.count('recommendations') == 2
+    store.close()
+
+    store = KnowledgeStore(db_path, normalize=True)
+    assert store.count('recommendations') == 1
+    assert store.source_count('recommendations', VARIANTS[1]) == 2
+    assert store.get_items('recommendations', category='sensory_integration') == VARIANTS[:1]
+    assert len(store.recommendation_index) == 1
+    assert store.get_relevant_recommendations("temporizadores", top_n=5) == VARIANTS[:1]
+
+    # Las huellas nuevas usan el modo con el que se abrió la base
+    store.update_knowledge_base({'recommendations': ["SE RECOMIENDA usar temporizadores visuales"]},
+                                source='b.txt')
+    assert store.count('recommendations') == 1
+    assert store.source_count('recommendations', VARIANTS[0]) == 3
+    store.close()
+
+
+def test_legacy_database_without_hashes(tmp_path):
+    db_path = str(tmp_path / 'legacy.db')
+    conn = sqlite3.connect(db_path)
+    conn.executescript("""
+        CREATE TABLE items (id INTEGER PRIMARY KEY, kind TEXT NOT NULL,
+                            text TEXT NOT NULL, source TEXT);
+    """)
+    conn.executemany("INSERT INTO items (kind, text, source) VALUES ('recommendations', ?, 'a.txt')",
+                     [(text,) for text in VARIANTS])
+    conn.commit()
+    conn.close()
+
+    store = KnowledgeStore(db_path, normalize=True)
+    assert store.count('recommendations') == 1
+    assert VARIANTS[1] in store['recommendations']
+    store.close()
@@ -0,0 +1,92 @@
+# test_knowledge_sync.py
+from knowledge_extractor import DocumentProcessor
+from knowledge_sync import KnowledgeSync
+from recommendations_engine import EducationalRecommender
+
+ADHD_ORGANIZATION = "Se recomienda usar una agenda para mejorar la organización."
+ADHD_ATTENTION = "Se sugiere reducir los estímulos que afectan la concentración."
+SENSORY = "Se recomienda una actividad sensorial moderada antes de leer."
+MINDFULNESS = "Se aconseja practicar la meditación al iniciar la jornada."
+GENERAL = "Se recomienda revisar los resultados con la familia cada mes."
+GENERAL_READING = "Se sugiere dedicar tiempo diario a la lectura compartida."
+
+
+def all_recommendations(recommender: EducationalRecommender) -> set:
+    """Recomendaciones que aparecen en alguna combinación de niveles."""
+    return {
+        text
+        for recommendation_set in recommender._get_combination_table()
+        for texts in recommendation_set.values()
+        for text in texts
+    }
+
+
+def test_synced_recommendations_reach_the_rules():
+    processor = DocumentProcessor()
+    recommender = EducationalRecommender()
+    recommender.prepare()
+    sync = KnowledgeSync(processor, recommender)
+
+    processor.update_knowledge_base({
+        'recommendations': [ADHD_ORGANIZATION, ADHD_ATTENTION, SENSORY, MINDFULNESS]
+    })
+    assert sync.sync() == 4
+    assert sync.version == 4
+    assert sync.sync() == 0
+
+    # Hábitos de estudio bajos: estrategia TDAH de organización
+    analysis = recommender.get_personalized_recommendations(
+        {'organizacion': 1, 'planificacion': 1, 'constancia': 1, 'metodologia': 1}
+    )
+    assert ADHD_ORGANIZATION in analysis['recommendations']['adhd']
+
+    # Atención baja: estrategia TDAH de atención y mindfulness
+    analysis = recommender.get_personalized_recommendations(
+        {'memoria': 1, 'atencion': 1, 'razonamiento': 1, 'velocidad': 1}
+    )
+    assert ADHD_ATTENTION in analysis['recommendations']['adhd']
+    assert MINDFULNESS in analysis['recommendations']['mindfulness']
+
+    # Atención media: integración sensorial de nivel moderado
+    analysis = recommender.get_personalized_recommendations(
+        {'memoria': 5, 'atencion': 5, 'razonamiento': 5, 'velocidad': 5}
+    )
+    assert SENSORY in analysis['recommendations']['sensory']
+
+    assert {ADHD_ORGANIZATION, ADHD_ATTENTION, SENSORY, MINDFULNESS} <= all_recommendations(recommender)
+
+
+def test_incremental_tables_match_full_rebuild():
+    processor = DocumentProcessor()
+    recommender = EducationalRecommender()
+    recommender.prepare()
+    sync = KnowledgeSync(processor, recommender)
+    processor.update_knowledge_base({'recommendations': [ADHD_ORGANIZATION, SENSORY]})
+    sync.sync()
+
+    rebuilt = EducationalRecommender()
+    rebuilt.knowledge_base = recommender.knowledge_base
+    assert recommender._get_combination_table() == rebuilt._get_combination_table()
+
+
+def test_unclassified_recommendations_reach_the_general_group():
+    processor = DocumentProcessor()
+    recommender = EducationalRecommender()
+    recommender.prepare()
+    sync = KnowledgeSync(processor, recommender)
+
+    processor.update_knowledge_base({'recommendations': [GENERAL, GENERAL_READING]})
+    assert sync.sync() == 2
+
+    # Sin tema: cualquier categoría con nivel bajo (aquí solo la social)
+    student = dict.fromkeys(recommender.fields, 9)
+    student.update({'equipo': 1, 'comunicacion': 1, 'empatia': 1, 'autorregulacion': 1})
+    analysis = recommender.get_personalized_recommendations(student)
+    assert GENERAL in analysis['recommendations']['general']
+    assert GENERAL_READING not in analysis['recommendations']['general']
+
+    # Con tema: solo su categoría
+    analysis = recommender.get_personalized_recommendations(
+        {'matematicas': 1, 'lectura': 1, 'escritura': 1, 'ciencias': 1}
+    )
+    assert GENERAL_READING in analysis['recommendations']['general']
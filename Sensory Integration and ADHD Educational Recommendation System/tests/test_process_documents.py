@@ -0,0 +1,74 @@
+# test_process_documents.py
+import multiprocessing
+import pytest
+import spacy
+import knowledge_extractor
+from knowledge_extractor import DocumentProcessor, process_documents
+from processing_metrics import ProcessingMetrics
+
+fork_only = pytest.mark.skipif(multiprocessing.get_start_method() != 'fork',
+                               reason="Los procesos del pool deben heredar el modelo mínimo")
+
+
+def blank_nlp(model=None, disable=()):
+    """Modelo mínimo (solo división en oraciones) en lugar del modelo instalado."""
+    nlp = spacy.blank('es')
+    nlp.add_pipe('sentencizer')
+    return nlp
+
+
+def write_reports(directory, count: int = 4) -> list:
+    paths = []
+    for i in range(count):
+        path = directory / f"informe{i}.txt"
+        path.write_text(
+            f"El alumno {i} muestra falta de ATENCION. "
+            f"Se recomienda trabajar la motricidad fina. Texto neutro {i}.",
+            encoding='utf-8'
+        )
+        paths.append(str(path))
+    return paths
+
+
+@fork_only
+def test_workers_use_the_processor_config(tmp_path, monkeypatch):
+    monkeypatch.setattr(knowledge_extractor, 'load_nlp', blank_nlp)
+    paths = write_reports(tmp_path)
+
+    results = {}
+    for workers in (1, 2):
+        processor = DocumentProcessor(accent_insensitive=True, chunk_size=50)
+        processor.add_category_terms('motor', ['motricidad'])
+        results[workers] = process_documents(paths, workers=workers, batch_size=1,
+                                             processor=processor)
+
+    assert results[1] == results[2]
+    assert all(result['categorized_content']['adhd'] for result in results[2])
+    assert all(result['categorized_content']['motor'] for result in results[2])
+
+
+@fork_only
+def test_worker_metrics_reach_the_caller(tmp_path, monkeypatch):
+    monkeypatch.setattr(knowledge_extractor, 'load_nlp', blank_nlp)
+    paths = write_reports(tmp_path)
+
+    summaries = {}
+    for workers in (1, 2):
+        processor = DocumentProcessor(metrics=ProcessingMetrics())
+        process_documents(paths, workers=workers, batch_size=1, processor=processor)
+        summaries[workers] = processor.metrics.summary()
+
+    assert summaries[2]['counters'] == summaries[1]['counters']
+    assert summaries[2]['counters']['documents'] == len(paths)
+    assert summaries[2]['counters']['sentences'] > 0
+    assert {'read', 'parse'} <= set(summaries[2]['stages'])
+    for stage in ('match', 'knowledge_base'):
+        assert summaries[2]['stages'][stage]['calls'] == summaries[1]['stages'][stage]['calls']
+
+
+def test_extraction_config_round_trip():
+    processor = DocumentProcessor(word_boundary=True, chunk_size=1000)
+    processor.add_category_terms('motor', ['motricidad'])
+    copy = DocumentProcessor.from_extraction_config(processor.extraction_config())
+    assert copy.extraction_config() == processor.extraction_config()
+    assert copy.cache_fingerprint == processor.cache_fingerprint
@@ -0,0 +1,86 @@
+# test_retrieval_index.py
+import os
+import numpy as np
+from knowledge_store import KnowledgeStore
+from retrieval_index import RecommendationIndex
+
+TEXTS = [
+    "Se recomienda usar temporizadores visuales",
+    "Se sugiere practicar respiración consciente",
+    "Se aconseja dividir las tareas en pasos"
+]
+
+
+def test_save_load_round_trip(tmp_path):
+    path = str(tmp_path / 'index')
+    index = RecommendationIndex()
+    index.add([1, 2, 3], TEXTS)
+    index.save(path)
+
+    # Guardar de nuevo un índice cargado con mmap desde el mismo directorio
+    loaded = RecommendationIndex.load(path)
+    loaded.save(path)
+    loaded = RecommendationIndex.load(path)
+    assert loaded.query("respiración consciente", top_n=1) == [2]
+
+    # Añadir filas y volver a guardar sobre los archivos mapeados
+    loaded.add([4], ["Se recomienda respiración con pausas activas"])
+    loaded.save(path)
+    reloaded = RecommendationIndex.load(path)
+    assert len(reloaded) == 4
+    assert reloaded.query("pausas activas", top_n=1) == [4]
+
+
+def test_store_reopen_keeps_index(tmp_path):
+    db_path = str(tmp_path / 'knowledge_base.db')
+    store = KnowledgeStore(db_path)
+    store.update_knowledge_base({'recommendations': TEXTS}, source='a.txt')
+    store.close()
+
+    for _ in range(2):
+        store = KnowledgeStore(db_path)
+        assert store.get_relevant_recommendations("tareas en pasos", top_n=1) == [TEXTS[2]]
+        store.close()
+    assert os.path.exists(os.path.join(db_path + '.index', 'vocabulary.json'))
+
+
+def test_ranking_matches_tfidf_vectorizer():
+    from sklearn.feature_extraction.text import TfidfVectorizer
+    from sklearn.metrics.pairwise import cosine_similarity
+
+    rng = np.random.default_rng(0)
+    words = ["uno", "dos", "tres", "cuatro", "cinco", "seis", "siete", "ocho",
+             "atención", "rutina", "calma", "pausas"]
+    corpus = [" ".join(rng.choice(words, size=rng.integers(2, 8))) for _ in range(60)]
+    queries = [" ".join(rng.choice(words, size=rng.integers(1, 4))) for _ in range(40)]
+    queries.append("tres cinco")
+
+    index = RecommendationIndex()
+    index.add(range(len(corpus)), corpus)
+    vectorizer = TfidfVectorizer()
+    matrix = vectorizer.fit_transform(corpus)
+    for query in queries:
+        expected = cosine_similarity(vectorizer.transform([query]), matrix)[0]
+        top = index.query(query, top_n=5)
+        # Comparar puntuaciones y no identificadores, por si hay empates
+        assert np.allclose(expected[top], np.sort(expected)[::-1][:5])
+
+
+def test_store_indexes_rows_from_other_writers(tmp_path):
+    db_path = str(tmp_path / 'knowledge.db')
+    app = KnowledgeStore(db_path)
+    app.update_knowledge_base({'recommendations': [TEXTS[0]]})
+
+    # Otro proceso (la importación por línea de comandos) escribe en la misma base
+    cli = KnowledgeStore(db_path)
+    cli.update_knowledge_base({'recommendations': [TEXTS[1]]})
+    cli.close()
+    assert app.get_relevant_recommendations("respiración consciente", top_n=1) == [TEXTS[1]]
+
+    app.update_knowledge_base({'recommendations': [TEXTS[2]]})
+    app.close()
+
+    store = KnowledgeStore(db_path)
+    assert len(store.recommendation_index) == store.count('recommendations') == 3
+    assert store.get_relevant_recommendations("respiración consciente", top_n=1) == [TEXTS[1]]
+    store.close()
@@ -0,0 +1,51 @@
+# test_sentence_table.py
+import os
+from sentence_table import SentenceTable
+
+KNOWLEDGE = {
+    'recommendations': ["Se recomienda usar temporizadores visuales"],
+    'interventions': ["Dividir las tareas en pasos cortos"],
+    'categorized_content': {'adhd': ["Se recomienda usar temporizadores visuales"]},
+    'pages': {}
+}
+
+
+def test_same_document_is_appended_once(tmp_path):
+    path = str(tmp_path / 'sentences')
+    table = SentenceTable(path)
+    assert table.append_knowledge(KNOWLEDGE, source='informe.txt')
+    for _ in range(2):
+        assert not table.append_knowledge(KNOWLEDGE, source='informe.txt')
+    assert len(table) == 2
+
+    # El registro de documentos sobrevive al reabrir la tabla
+    reopened = SentenceTable(path)
+    assert not reopened.append_knowledge(KNOWLEDGE, source='informe.txt')
+    assert len(reopened) == 2
+    assert len(reopened.select(source='informe.txt')) == 2
+
+
+def test_changed_or_other_document_is_appended():
+    table = SentenceTable()
+    table.append_knowledge(KNOWLEDGE, source='informe.txt')
+    table.append_knowledge(KNOWLEDGE, source='otro.txt')
+    changed = dict(KNOWLEDGE, interventions=["Usar una agenda diaria"])
+    table.append_knowledge(changed, source='informe.txt')
+    assert len(table) == 6
+    assert len(table.select(source='informe.txt')) == 4
+
+
+def test_metadata_does_not_grow_with_documents(tmp_path):
+    path = str(tmp_path / 'sentences')
+    table = SentenceTable(path)
+    sizes = []
+    for i in range(50):
+        table.append_knowledge(KNOWLEDGE, source=f"informe-{i}.txt")
+        sizes.append(os.path.getsize(os.path.join(path, 'meta.json')))
+    assert max(sizes) - min(sizes) <= 8
+
+    reopened = SentenceTable(path)
+    assert len(reopened) == 100
+    assert reopened.sources == [f"informe-{i}.txt" for i in range(50)]
+    assert not reopened.append_knowledge(KNOWLEDGE, source='informe-7.txt')
+    assert reopened.provenance(15)['source'] == 'informe-7.txt'
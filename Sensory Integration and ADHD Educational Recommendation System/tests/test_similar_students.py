@@ -0,0 +1,35 @@
+# test_similar_students.py
+import numpy as np
+import pandas as pd
+from recommendations_engine import EducationalRecommender
+
+
+def history(recommender: EducationalRecommender, index) -> pd.DataFrame:
+    rng = np.random.default_rng(0)
+    values = rng.integers(0, 11, size=(len(index), len(recommender.fields)))
+    return pd.DataFrame(values, columns=recommender.fields, index=index)
+
+
+def test_string_ids_round_trip(tmp_path):
+    recommender = EducationalRecommender()
+    ids = [f"alumno-{i}" for i in range(20)]
+    data = history(recommender, ids)
+    recommender.build_similarity_index(data, [[f"rec {i}"] for i in range(20)])
+    path = str(tmp_path / 'similar.joblib')
+    recommender.save_similarity_index(path)
+
+    loaded = EducationalRecommender()
+    loaded.load_similarity_index(path)
+    similar = loaded.find_similar_students(data.iloc[3].to_dict(), k=3)
+    assert similar[0]['id'] == "alumno-3"
+    assert similar[0]['recommendations'] == ["rec 3"]
+    assert all(isinstance(case['id'], str) for case in similar)
+
+
+def test_numeric_ids_are_python_ints():
+    recommender = EducationalRecommender()
+    data = history(recommender, range(10))
+    recommender.build_similarity_index(data)
+    similar = recommender.find_similar_students(data.iloc[5].to_dict(), k=2)
+    assert similar[0]['id'] == 5
+    assert type(similar[0]['id']) is int
@@ -0,0 +1,178 @@
+# upload_queue.py
+import json
+import time
+import sqlite3
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+# Estados de un trabajo de la cola
+JOB_STATES = ('queued', 'running', 'done', 'failed')
+
+# Intervalo mínimo (segundos) entre escrituras del progreso de un trabajo
+PROGRESS_INTERVAL = 0.5
+
+
+class UploadQueue:
+    """Cola persistente de documentos subidos, procesados en segundo plano.
+
+    Cada trabajo (contenido, estado, progreso y resultados parciales) se
+    guarda en SQLite, de modo que `submit` vuelve enseguida y los trabajos
+    sobreviven a un reinicio: al crear la cola se retoman los que quedaron
+    pendientes o a medias. Un pool de hilos procesa varios documentos a la vez
+    con el `DocumentProcessor` compartido. Si un trabajo falla se conserva lo
+    extraído hasta el error y el contenido, para poder reintentarlo.
+    """
+
+    def __init__(self, processor, db_path: str = 'upload_queue.db', workers: int = 2):
+        self.processor = processor
+        self.db_path = db_path
+        self._lock = threading.RLock()
+        self.conn = sqlite3.connect(db_path, check_same_thread=False)
+        with self._lock, self.conn:
+            self.conn.execute("PRAGMA journal_mode=WAL")
+            self.conn.executescript("""
+                CREATE TABLE IF NOT EXISTS jobs (
+                    id INTEGER PRIMARY KEY AUTOINCREMENT,
+                    name TEXT NOT NULL,
+                    file_type TEXT NOT NULL,
+                    content BLOB,
+                    status TEXT NOT NULL DEFAULT 'queued',
+                    progress REAL NOT NULL DEFAULT 0,
+                    result TEXT,
+                    error TEXT,
+                    created REAL NOT NULL,
+                    updated REAL NOT NULL
+                );
+                CREATE INDEX IF NOT EXISTS idx_jobs_status ON jobs (status);
+            """)
+            # Los trabajos interrumpidos por un reinicio vuelven a la cola
+            self.conn.execute("UPDATE jobs SET status = 'queued' WHERE status = 'running'")
+            pending = [row[0] for row in self.conn.execute(
+                "SELECT id FROM jobs WHERE status = 'queued' ORDER BY id"
+            )]
+
+        self.executor = ThreadPoolExecutor(max_workers=workers,
+                                           thread_name_prefix='upload-queue')
+        for job_id in pending:
+            self.executor.submit(self._run, job_id)
+
+    def submit(self, name: str, file_type: str, content: bytes) -> int:
+        """Encola un documento y devuelve el identificador del trabajo."""
+        now = time.time()
+        with self._lock, self.conn:
+            job_id = self.conn.execute(
+                "INSERT INTO jobs (name, file_type, content, created, updated) "
+                "VALUES (?, ?, ?, ?, ?)",
+                (name, file_type, bytes(content), now, now)
+            ).lastrowid
+        self.executor.submit(self._run, job_id)
+        return job_id
+
+    def retry(self, job_id: int) -> bool:
+        """Vuelve a encolar un trabajo fallido; devuelve False si no se puede."""
+        with self._lock, self.conn:
+            updated = self.conn.execute(
+                "UPDATE jobs SET status = 'queued', progress = 0, error = NULL, updated = ? "
+                "WHERE id = ? AND status = 'failed' AND content IS NOT NULL",
+                (time.time(), job_id)
+            ).rowcount
+        if updated:
+            self.executor.submit(self._run, job_id)
+        return bool(updated)
+
+    def _update(self, job_id: int, **fields):
+        """Actualiza columnas de un trabajo."""
+        if 'result' in fields and fields['result'] is not None:
+            fields['result'] = json.dumps(fields['result'], ensure_ascii=False)
+        fields['updated'] = time.time()
+        columns = ', '.join(f"{column} = ?" for column in fields)
+        with self._lock, self.conn:
+            self.conn.execute(f"UPDATE jobs SET {columns} WHERE id = ?",
+                              (*fields.values(), job_id))
+
+    def _run(self, job_id: int):
+        """Procesa un trabajo en un hilo del pool."""
+        with self._lock:
+            row = self.conn.execute(
+                "SELECT name, file_type, content FROM jobs WHERE id = ? AND status = 'queued'",
+                (job_id,)
+            ).fetchone()
+        if row is None:
+            return
+        name, file_type, content = row
+        self._update(job_id, status='running', progress=0.0)
+
+        partial = {'knowledge': None}
+        last_write = [0.0]
+
+        def report(fraction, knowledge):
+            # Guardar el progreso y lo extraído hasta ahora, sin escribir en cada bloque
+            partial['knowledge'] = knowledge
+            now = time.monotonic()
+            if now - last_write[0] >= PROGRESS_INTERVAL:
+                last_write[0] = now
+                self._update(job_id, progress=min(fraction, 0.99), result=knowledge)
+
+        try:
+            knowledge = self.processor.process_document(content, file_type, source=name,
+                                                        progress=report)
+        except Exception as error:
+            self._update(job_id, status='failed', error=str(error), result=partial['knowledge'])
+            return
+        # El contenido ya no hace falta una vez incorporado a la base
+        self._update(job_id, status='done', progress=1.0, result=knowledge, content=None)
+
+    def _job(self, row: tuple) -> dict:
+        job_id, name, file_type, status, progress, result, error, created, updated = row
+        return {
+            'id': job_id,
+            'name': name,
+            'file_type': file_type,
+            'status': status,
+            'progress': progress,
+            'result': json.loads(result) if result else None,
+            'error': error,
+            'created': created,
+            'updated': updated
+        }
+
+    def get(self, job_id: int) -> dict:
+        """Estado, progreso y resultados (parciales o finales) de un trabajo."""
+        jobs = self.jobs([job_id])
+        return jobs[0] if jobs else None
+
+    def jobs(self, job_ids: list = None) -> list:
+        """Trabajos de la cola (todos o los indicados), en orden de llegada."""
+        query = ("SELECT id, name, file_type, status, progress, result, error, created, updated "
+                 "FROM jobs")
+        params = ()
+        if job_ids is not None:
+            job_ids = list(job_ids)
+            if not job_ids:
+                return []
+            query += f" WHERE id IN ({', '.join('?' * len(job_ids))})"
+            params = job_ids
+        with self._lock:
+            rows = self.conn.execute(query + " ORDER BY id", params).fetchall()
+        return [self._job(row) for row in rows]
+
+    def counts(self) -> dict:
+        """Número de trabajos en cada estado."""
+        counts = dict.fromkeys(JOB_STATES, 0)
+        with self._lock:
+            for status, count in self.conn.execute(
+                "SELECT status, COUNT(*) FROM jobs GROUP BY status"
+            ):
+                counts[status] = count
+        return counts
+
+    def clear_finished(self):
+        """Elimina los trabajos terminados correctamente."""
+        with self._lock, self.conn:
+            self.conn.execute("DELETE FROM jobs WHERE status = 'done'")
+
+    def close(self):
+        """Espera a los trabajos en curso y cierra la base (los pendientes se retoman al reabrir)."""
+        self.executor.shutdown(wait=True, cancel_futures=True)
+        with self._lock:
+            self.conn.close()